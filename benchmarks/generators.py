@@ -0,0 +1,153 @@
+import random
+import string
+from typing import Callable, Dict, List
+
+from day1.main import WORD_TO_NUMBER
+from day7.main import CARDS_ORDER
+
+# Each generator produces the text of a puzzle input. At scale 1 the inputs are roughly the size
+# of the real puzzle inputs, and the number of lines, cells or range maps grows linearly with the
+# scale.
+Generator = Callable[[int, random.Random], str]
+
+
+def generate_day1(scale: int, rng: random.Random) -> str:
+    tokens = list(string.ascii_lowercase) + list(WORD_TO_NUMBER) + list(string.digits)
+    lines = []
+    for _ in range(1000 * scale):
+        line = [rng.choice(tokens) for _ in range(rng.randint(3, 12))]
+        line.insert(rng.randint(0, len(line)), rng.choice(string.digits))
+        lines.append("".join(line))
+
+    return "\n".join(lines)
+
+
+def generate_day2(scale: int, rng: random.Random) -> str:
+    lines = []
+    for game_id in range(1, 100 * scale + 1):
+        handfuls = []
+        for _ in range(rng.randint(1, 6)):
+            colours = rng.sample(["red", "green", "blue"], rng.randint(1, 3))
+            handfuls.append(", ".join(f"{rng.randint(1, 20)} {c}" for c in colours))
+        lines.append(f"Game {game_id}: {'; '.join(handfuls)}")
+
+    return "\n".join(lines)
+
+
+def generate_day3(scale: int, rng: random.Random) -> str:
+    width = 140
+    rows = []
+    for _ in range(140 * scale):
+        row: List[str] = []
+        while len(row) < width:
+            roll = rng.random()
+            if roll < 0.08:
+                row.extend(str(rng.randint(1, 999)))
+            elif roll < 0.11:
+                row.append(rng.choice("*#+$/@=%&-"))
+            row.append(".")
+        rows.append("".join(row[:width]))
+
+    return "\n".join(rows)
+
+
+def generate_day4(scale: int, rng: random.Random) -> str:
+    num_cards = 200 * scale
+    lines = []
+    for card_id in range(1, num_cards + 1):
+        numbers = rng.sample(range(1, 100), 35)
+        winning_numbers, other_numbers = numbers[:10], numbers[10:]
+        num_matches = rng.randint(0, min(10, num_cards - card_id))
+        your_numbers = winning_numbers[:num_matches] + other_numbers[num_matches:]
+        rng.shuffle(your_numbers)
+        lines.append(
+            f"Card {card_id:>4}: {' '.join(f'{n:>2}' for n in winning_numbers)} |"
+            f" {' '.join(f'{n:>2}' for n in your_numbers)}"
+        )
+
+    return "\n".join(lines)
+
+
+def generate_day5(scale: int, rng: random.Random) -> str:
+    upper_bound = 2**32
+    seeds = []
+    for _ in range(10 * scale):
+        seeds.extend([rng.randrange(upper_bound), rng.randint(1, 2**28)])
+    sections = [f"seeds: {' '.join(str(s) for s in seeds)}"]
+
+    names = [
+        "seed",
+        "soil",
+        "fertilizer",
+        "water",
+        "light",
+        "temperature",
+        "humidity",
+        "location",
+    ]
+    for source, destination in zip(names, names[1:]):
+        cuts = sorted(rng.sample(range(upper_bound), 2 * 30 * scale))
+        range_maps = [
+            f"{rng.randrange(upper_bound)} {start} {end - start}"
+            for start, end in zip(cuts[::2], cuts[1::2])
+        ]
+        rng.shuffle(range_maps)
+        sections.append(f"{source}-to-{destination} map:\n" + "\n".join(range_maps))
+
+    return "\n\n".join(sections)
+
+
+def generate_day6(scale: int, rng: random.Random) -> str:
+    times = [rng.randint(10, 100) for _ in range(4 * scale)]
+    distances = [rng.randint(0, t * t // 4) for t in times]
+    return (
+        f"Time:      {' '.join(str(t) for t in times)}\n"
+        f"Distance:  {' '.join(str(d) for d in distances)}"
+    )
+
+
+def generate_day7(scale: int, rng: random.Random) -> str:
+    return "\n".join(
+        f"{''.join(rng.choices(CARDS_ORDER, k=5))} {rng.randint(1, 1000)}"
+        for _ in range(1000 * scale)
+    )
+
+
+def generate_day8(scale: int, rng: random.Random) -> str:
+    num_nodes = 700 * scale
+    names = [f"N{i:X}X" for i in range(num_nodes)]
+    names[0], names[1] = "AAA", "ZZZ"
+    for i in range(2, num_nodes, 100):
+        names[i] = f"N{i:X}A"
+        names[i + 1] = f"N{i:X}Z"
+
+    instructions = "".join(rng.choices("LR", k=300))
+    nodes = [f"{n} = ({rng.choice(names)}, {rng.choice(names)})" for n in names]
+    return f"{instructions}\n\n" + "\n".join(nodes)
+
+
+def generate_day9(scale: int, rng: random.Random) -> str:
+    lines = []
+    for _ in range(200 * scale):
+        coefficients = [rng.randint(-10, 10) for _ in range(rng.randint(1, 7))]
+        lines.append(
+            " ".join(
+                str(sum(c * x**power for power, c in enumerate(coefficients)))
+                for x in range(21)
+            )
+        )
+
+    return "\n".join(lines)
+
+
+GENERATORS: Dict[str, Generator] = {
+    "day1": generate_day1,
+    "day2": generate_day2,
+    "day3": generate_day3,
+    "day4": generate_day4,
+    "day5": generate_day5,
+    "day6": generate_day6,
+    "day7": generate_day7,
+    "day8": generate_day8,
+    "day9": generate_day9,
+}
@@ -0,0 +1,75 @@
+import random
+from argparse import ArgumentParser
+from typing import Optional
+
+from benchmarks.generators import GENERATORS
+from day2 import main as day2
+from day4 import main as day4
+from day5 import main as day5
+from utils.benchmark import time_per_item
+from utils.utils import find_between, flatten, iflatten
+
+
+def slicing_find_between(string: str, before: str, after: str) -> Optional[str]:
+    """
+    The previous implementation of try_parse_value_between_strings, which copies the tail of
+    string to search it for after.
+    """
+    before_idx = string.find(before)
+    if before_idx == -1:
+        return None
+    before_idx += len(before)
+
+    after_idx = string[before_idx:].find(after)
+    if after_idx == -1:
+        return None
+
+    return string[before_idx : before_idx + after_idx]
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Time the parse helpers and the per-line parsers built on them"
+    )
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=2023)
+    args = parser.parse_args()
+
+    game_lines = GENERATORS["day2"](args.scale, random.Random(args.seed)).splitlines()
+    card_lines = GENERATORS["day4"](args.scale, random.Random(args.seed)).splitlines()
+    _, *map_sections = GENERATORS["day5"](args.scale, random.Random(args.seed)).split(
+        "\n\n"
+    )
+
+    time_per_item(
+        "slicing between, game lines",
+        game_lines,
+        lambda line: slicing_find_between(line, "Game ", ": "),
+    )
+    time_per_item(
+        "find_between, game lines",
+        game_lines,
+        lambda line: find_between(line, "Game ", ": "),
+    )
+    time_per_item(
+        "slicing between, map sections",
+        map_sections,
+        lambda section: slicing_find_between(section, "-to-", " map:"),
+    )
+    time_per_item(
+        "find_between, map sections",
+        map_sections,
+        lambda section: find_between(section, "-to-", " map:"),
+    )
+
+    nested = [list(range(100)) for _ in range(10**4)]
+    time_per_item("min of flatten", [nested], lambda lists: min(flatten(lists)))
+    time_per_item("min of iflatten", [nested], lambda lists: min(iflatten(lists)))
+
+    time_per_item("Game.parse", game_lines, day2.Game.parse)
+    time_per_item("Card.parse", card_lines, day4.Card.parse)
+    time_per_item("Map.parse", map_sections, day5.Map.parse)
+
+
+if __name__ == "__main__":
+    main()
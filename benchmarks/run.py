@@ -0,0 +1,420 @@
+import json
+import random
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Dict, List
+
+from benchmarks.generators import GENERATORS
+from day1 import main as day1
+from day2 import main as day2
+from day3 import main as day3
+from day4 import main as day4
+from day5 import main as day5
+from day6 import main as day6
+from day7 import main as day7
+from day8 import main as day8
+from day9 import main as day9
+from utils.utils import T
+
+# Timings depend on the machine, so each machine records its own baseline with --save-baseline
+BASELINE_PATH = Path(__file__).resolve().parent.parent / ".benchmark_baseline.json"
+# Timings shorter than this many calibration loops are dominated by noise, so they never count
+# as regressions
+NOISE_FLOOR_LOOPS = 0.5
+CALIBRATION_ROUNDS = 5
+MAX_DOUBLING_STATES = 10**7
+
+
+class Timings:
+    def __init__(self) -> None:
+        self.seconds: Dict[str, float] = {}
+
+    def time(self, name: str, function: Callable[[], T]) -> T:
+        start = perf_counter()
+        result = function()
+        self.seconds[name] = perf_counter() - start
+        return result
+
+
+def benchmark_day1(text: str, timings: Timings) -> None:
+    lines = text.splitlines()
+    timings.time(
+        "calibration_sum digits",
+        lambda: day1.calibration_sum(lines, day1.calibration_value_from_digits),
+    )
+    timings.time(
+        "calibration_sum digits or spelled",
+        lambda: day1.calibration_sum(
+            lines, day1.calibration_value_from_digits_or_spelled
+        ),
+    )
+
+
+def benchmark_day2(text: str, timings: Timings) -> None:
+    games = timings.time(
+        "Game.parse", lambda: [day2.Game.parse(line) for line in text.splitlines()]
+    )
+    constraint = day2.Constraint(max_blue=14, max_red=12, max_green=13)
+    timings.time(
+        "Constraint.breached",
+        lambda: [
+            any(constraint.breached(handful) for handful in game.handfuls)
+            for game in games
+        ],
+    )
+    timings.time(
+        "minimum_set_for_game_to_be_possible",
+        lambda: [game.minimum_set_for_game_to_be_possible().power() for game in games],
+    )
+    columns = timings.time(
+        "GameColumns.from_games", lambda: day2.GameColumns.from_games(games)
+    )
+    timings.time(
+        "GameColumns.possible_game_id_sum",
+        lambda: columns.possible_game_id_sum(constraint),
+    )
+    rng = random.Random(len(games))
+    constraints = [
+        day2.Constraint(
+            max_blue=rng.randint(0, 20),
+            max_red=rng.randint(0, 20),
+            max_green=rng.randint(0, 20),
+        )
+        for _ in range(1000)
+    ]
+    timings.time(
+        "GameColumns.possible_game_id_sums x1000",
+        lambda: columns.possible_game_id_sums(constraints),
+    )
+
+
+def benchmark_day3(text: str, timings: Timings) -> None:
+    index = timings.time(
+        "SchematicIndex.build", lambda: day3.SchematicIndex.build(text.splitlines())
+    )
+    timings.time("SchematicIndex.part_numbers", index.part_numbers)
+    timings.time("SchematicIndex.gear_ratios", index.gear_ratios)
+    timings.time(
+        "stream_parts_and_gears",
+        lambda: list(day3.stream_parts_and_gears(text.splitlines())),
+    )
+
+
+def benchmark_day4(text: str, timings: Timings) -> None:
+    cards = timings.time(
+        "Card.parse", lambda: [day4.Card.parse(line) for line in text.splitlines()]
+    )
+    timings.time("get_points", lambda: [card.get_points() for card in cards])
+    timings.time("process_cards", lambda: day4.process_cards(cards))
+
+
+def benchmark_day5(text: str, timings: Timings) -> None:
+    seeds_section, *map_sections = text.split("\n\n")
+    seeds = day5.parse_seeds_as_ints(seeds_section)
+    seed_ranges = day5.parse_seeds_as_number_ranges(seeds_section)
+    maps = timings.time(
+        "Map.parse", lambda: [day5.Map.parse(section) for section in map_sections]
+    )
+    source_to_map = {m.source: m for m in maps}
+    timings.time(
+        "traverse", lambda: [day5.traverse(seed, source_to_map) for seed in seeds]
+    )
+    timings.time(
+        "traverse_range",
+        lambda: [
+            day5.traverse_range(day5.RangeSet.of([seed_range]), source_to_map)
+            for seed_range in seed_ranges
+        ],
+    )
+    timings.time(
+        "traverse_range all seeds",
+        lambda: day5.traverse_range(day5.RangeSet.of(seed_ranges), source_to_map),
+    )
+    seed_to_location = timings.time(
+        "compose", lambda: day5.compose(day5.map_chain(source_to_map))
+    )
+    timings.time("composed map_array", lambda: seed_to_location.map_array(seeds))
+    timings.time(
+        "composed map_range",
+        lambda: [seed_to_location.map_range(seed_range) for seed_range in seed_ranges],
+    )
+    timings.time(
+        "composed map_range_set",
+        lambda: seed_to_location.map_range_set(day5.RangeSet.of(seed_ranges)),
+    )
+    timings.time(
+        "composed lowest_image",
+        lambda: seed_to_location.lowest_image(day5.RangeSet.of(seed_ranges)),
+    )
+
+
+def benchmark_day6(text: str, timings: Timings) -> None:
+    time_line, distance_line = text.splitlines()
+    races = [
+        day6.Race(time=int(t), distance=int(d))
+        for t, d in zip(time_line.split()[1:], distance_line.split()[1:])
+    ]
+    timings.time(
+        "winning_button_press_times",
+        lambda: [len(race.winning_button_press_times()) for race in races],
+    )
+    timings.time(
+        "count_winning_times", lambda: [race.count_winning_times() for race in races]
+    )
+
+
+def benchmark_day7(text: str, timings: Timings) -> None:
+    lines = text.splitlines()
+    turns = timings.time(
+        "Turn.parse", lambda: [day7.Turn.parse(line) for line in lines]
+    )
+    timings.time("Hand.type", lambda: [turn.hand.type for turn in turns])
+    timings.time("total_winnings", lambda: day7.total_winnings(turns))
+    timings.time(
+        "CompactHands total_winnings",
+        lambda: day7.CompactHands.parse(lines).with_jokers(True).total_winnings(),
+    )
+
+
+def check_doubling_table(
+    compiled_map: day8.CompiledMap,
+    instruction_codes: bytes,
+    doubling_table: day8.DoublingTable,
+) -> None:
+    """
+    Checks the positions the doubling table gives against following the instructions one step at
+    a time, for a sample of start nodes over the first few passes.
+    """
+    for start in range(
+        0, len(compiled_map.names), max(1, len(compiled_map.names) // 10)
+    ):
+        node = start
+        for step in range(3 * len(instruction_codes) + 1):
+            offset = step % len(instruction_codes)
+            assert doubling_table.position_after(start, step) == (node, offset)
+            node = compiled_map.successors[instruction_codes[offset]][node]
+
+
+def benchmark_day8(text: str, timings: Timings) -> None:
+    raw_instructions, raw_map = text.split("\n\n")
+    node_map = timings.time("Map.parse", lambda: day8.Map.parse(raw_map))
+    instruction_codes = day8.encode_instructions(
+        [day8.Instruction(i) for i in raw_instructions]
+    )
+    compiled_map = timings.time(
+        "CompiledMap.compile", lambda: day8.CompiledMap.compile(node_map)
+    )
+    pass_table = day8.PassTable(
+        compiled_map,
+        instruction_codes,
+        compiled_map.mark(lambda node: node == day8.END_NODE),
+    )
+    steps = timings.time(
+        "steps_to_reach",
+        lambda: day8.steps_to_reach(pass_table, compiled_map.index(day8.START_NODE)),
+    )
+    is_ghost_end = compiled_map.mark(lambda node: node.endswith("Z"))
+    ghost_cycles = timings.time(
+        "GhostCycle.find",
+        lambda: [
+            day8.GhostCycle.find(
+                compiled_map, instruction_codes, compiled_map.index(node), is_ghost_end
+            )
+            for node in compiled_map.names
+            if node.endswith("A")
+        ],
+    )
+    ghost_steps = timings.time(
+        "first_common_hit", lambda: day8.first_common_hit(ghost_cycles)
+    )
+
+    # The doubling table holds log2(len(instructions)) arrays over every (node, offset) state
+    if len(compiled_map.names) * len(instruction_codes) > MAX_DOUBLING_STATES:
+        return
+    doubling_table = timings.time(
+        "DoublingTable.build",
+        lambda: day8.DoublingTable.build(pass_table),
+    )
+    timings.time(
+        "DoublingTable.position_after",
+        lambda: [
+            doubling_table.position_after(node, 10**15)
+            for node in range(len(compiled_map.names))
+        ],
+    )
+    check_doubling_table(compiled_map, instruction_codes, doubling_table)
+    if steps is not None:
+        end_node, _ = doubling_table.position_after(
+            compiled_map.index(day8.START_NODE), steps
+        )
+        assert compiled_map.names[end_node] == day8.END_NODE
+    if ghost_steps is not None:
+        ghost_starts = [
+            compiled_map.index(node)
+            for node in compiled_map.names
+            if node.endswith("A")
+        ]
+        assert doubling_table.all_at_end(ghost_starts, ghost_steps, is_ghost_end)
+
+
+def benchmark_day9(text: str, timings: Timings) -> None:
+    sequences = timings.time(
+        "Sequence.parse",
+        lambda: [day9.Sequence.parse(line) for line in text.splitlines()],
+    )
+    timings.time(
+        "Sequence.extrapolate",
+        lambda: [
+            sequence.extrapolate(direction)
+            for sequence in sequences
+            for direction in day9.Direction
+        ],
+    )
+    timings.time("extrapolated_sums", lambda: day9.extrapolated_sums(sequences))
+
+
+BENCHMARKS: Dict[str, Callable[[str, Timings], None]] = {
+    "day1": benchmark_day1,
+    "day2": benchmark_day2,
+    "day3": benchmark_day3,
+    "day4": benchmark_day4,
+    "day5": benchmark_day5,
+    "day6": benchmark_day6,
+    "day7": benchmark_day7,
+    "day8": benchmark_day8,
+    "day9": benchmark_day9,
+}
+
+
+def calibrate() -> float:
+    """
+    Times a fixed loop of the dict, list and integer operations the days are made of. Dividing
+    timings by it evens out the machine speeding up or slowing down between runs, but timings
+    are still not comparable between machines, so each machine keeps its own baseline.
+    :return: the fastest of a few runs of the loop, in seconds
+    """
+
+    def loop() -> float:
+        start = perf_counter()
+        counts: Dict[int, int] = {}
+        values = []
+        for i in range(100_000):
+            counts[i % 1000] = counts.get(i % 1000, 0) + i
+            values.append(i * 31 % 977)
+        values.sort()
+        return perf_counter() - start
+
+    return min(loop() for _ in range(CALIBRATION_ROUNDS))
+
+
+def run(days: List[str], scales: List[int], seed: int) -> Dict[str, float]:
+    """
+    The calibration loop is rerun before each day and scale, so that the machine getting faster
+    or slower during a long run does not skew the later timings.
+    :return: the time taken by each benchmark in multiples of the calibration loop, keyed by
+    "<day>/<benchmark>@<scale>x"
+    """
+    results = {}
+    for day in days:
+        for scale in scales:
+            text = GENERATORS[day](scale, random.Random(seed))
+            calibration_seconds = calibrate()
+            timings = Timings()
+            BENCHMARKS[day](text, timings)
+            for name, seconds in timings.seconds.items():
+                key = f"{day}/{name}@{scale}x"
+                results[key] = seconds / calibration_seconds
+                print(
+                    f"{key:<60} {seconds:10.4f}s {results[key]:10.2f} loops", flush=True
+                )
+
+    return results
+
+
+def find_regressions(
+    results: Dict[str, float], baseline: Dict[str, float], tolerance: float
+) -> List[str]:
+    """
+    :param results: timings in multiples of the calibration loop, see run
+    :param baseline: earlier results to compare against
+    """
+    regressions = []
+    for key, loops in results.items():
+        if key not in baseline:
+            continue
+        allowed = max(baseline[key] * (1 + tolerance), NOISE_FLOOR_LOOPS)
+        if loops > allowed:
+            regressions.append(
+                f"{key} took {loops:.2f} calibration loops, baseline {baseline[key]:.2f}"
+                f" (allowed {allowed:.2f})"
+            )
+
+    return regressions
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Time every day's public functions on generated inputs"
+    )
+    parser.add_argument(
+        "days", nargs="*", default=list(BENCHMARKS), help="days to benchmark"
+    )
+    parser.add_argument(
+        "--scales",
+        type=int,
+        nargs="+",
+        default=[1, 100],
+        help="input sizes relative to the real puzzle inputs, e.g. 1 100 10000",
+    )
+    parser.add_argument("--seed", type=int, default=2023)
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="fraction by which a timing may exceed its baseline before failing",
+    )
+    parser.add_argument(
+        "--baseline",
+        type=Path,
+        default=BASELINE_PATH,
+        help="timings recorded on this machine by an earlier run with --save-baseline",
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="record these timings in the baseline instead of checking against it",
+    )
+    args = parser.parse_args()
+
+    results = run(args.days, args.scales, args.seed)
+
+    if not args.save_baseline and not args.baseline.exists():
+        print(
+            f"No baseline at {args.baseline}, so nothing to compare against. Record one on this"
+            " machine with --save-baseline before making changes."
+        )
+        return
+
+    baseline: Dict[str, float] = (
+        json.loads(args.baseline.read_text("utf-8")) if args.baseline.exists() else {}
+    )
+    if args.save_baseline:
+        baseline.update({key: round(loops, 3) for key, loops in results.items()})
+        args.baseline.write_text(
+            json.dumps(baseline, indent=2, sort_keys=True) + "\n", "utf-8"
+        )
+        print(f"Saved {len(results)} timings to {args.baseline}")
+        return
+
+    regressions = find_regressions(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print(f"No regressions beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,14 @@ from pathlib import Path
 
 YEAR = 2023
 PROJECT_ROOT = Path(__file__).parent.resolve()
-TEMPLATE = r"""from pathlib import Path
+TEMPLATE = r"""from utils.input_reader import parse_args, read_lines
+from utils.instrumentation import profiled
 
 
+@profiled
 def main() -> None:
-    input_lines = Path("input/input.txt").read_text("utf-8").split("\n")
+    args = parse_args(__file__)
+    input_lines = read_lines(args.input)
 
 
 if __name__ == "__main__":
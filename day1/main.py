@@ -1,5 +1,8 @@
-from pathlib import Path
-from typing import Callable, List
+import re
+from typing import Callable, Iterable, List
+
+from utils.input_reader import parse_args, read_lines
+from utils.instrumentation import profiled
 
 WORD_TO_NUMBER = {
     "one": 1,
@@ -13,44 +16,70 @@ WORD_TO_NUMBER = {
     "nine": 9,
 }
 
+DIGIT_OR_SPELLED_PATTERN = "|".join([r"\d", *WORD_TO_NUMBER])
+FIRST_DIGIT_OR_SPELLED = re.compile(DIGIT_OR_SPELLED_PATTERN)
+# The greedy prefix backtracks from the end of the line, so the group captures the match that
+# starts last. This handles overlaps such as "eightwo", whose last digit is "two".
+LAST_DIGIT_OR_SPELLED = re.compile(f".*({DIGIT_OR_SPELLED_PATTERN})")
+
 
 def calibration_value_from_digits(line: str) -> int:
     numbers = [int(char) for char in line if char.isdigit()]
     return numbers[0] * 10 + numbers[-1]
 
 
+def _digit_or_spelled_value(token: str) -> int:
+    return int(token) if token.isdigit() else WORD_TO_NUMBER[token]
+
+
 def calibration_value_from_digits_or_spelled(line: str) -> int:
-    numbers = []
-    for i, char in enumerate(line):
-        if char.isdigit():
-            numbers.append(int(char))
-        for word, digit in WORD_TO_NUMBER.items():
-            if line[i:].startswith(word):
-                numbers.append(digit)
+    first = FIRST_DIGIT_OR_SPELLED.search(line)
+    last = LAST_DIGIT_OR_SPELLED.match(line)
+    assert first is not None and last is not None, f"No digits found in {line}"
 
-    return numbers[0] * 10 + numbers[-1]
+    first_digit = _digit_or_spelled_value(first.group(0))
+    last_digit = _digit_or_spelled_value(last.group(1))
+    return first_digit * 10 + last_digit
+
+
+def calibration_sums(
+    calibration_document: Iterable[str],
+    *get_calibration_values: Callable[[str], int],
+) -> List[int]:
+    """
+    Computes one calibration sum per get_calibration_value in a single pass over the document, so
+    the document can be a one-shot stream.
+    """
+    sums = [0] * len(get_calibration_values)
+    for line in calibration_document:
+        for i, get_calibration_value in enumerate(get_calibration_values):
+            sums[i] += get_calibration_value(line)
+
+    return sums
 
 
 def calibration_sum(
-    calibration_document: List[str], get_calibration_value: Callable[[str], int]
+    calibration_document: Iterable[str], get_calibration_value: Callable[[str], int]
 ) -> int:
     return sum(get_calibration_value(line) for line in calibration_document)
 
 
+@profiled
 def main() -> None:
-    input_lines = Path("input/input.txt").read_text("utf-8").split("\n")
+    args = parse_args(__file__)
 
-    sum_of_calibration_values_using_digits = calibration_sum(
-        input_lines, calibration_value_from_digits
+    (
+        sum_of_calibration_values_using_digits,
+        sum_of_calibration_values_using_digits_and_words,
+    ) = calibration_sums(
+        read_lines(args.input),
+        calibration_value_from_digits,
+        calibration_value_from_digits_or_spelled,
     )
     print(
         "The sum of all the calibration values using only digits was"
         f" {sum_of_calibration_values_using_digits}"
     )
-
-    sum_of_calibration_values_using_digits_and_words = calibration_sum(
-        input_lines, calibration_value_from_digits_or_spelled
-    )
     print(
         "The sum of all the calibration values using digits and words was"
         f" {sum_of_calibration_values_using_digits_and_words}"
@@ -1,12 +1,19 @@
+from array import array
+from bisect import bisect_right
 from collections import defaultdict
 from dataclasses import dataclass
-from pathlib import Path
-from typing import Dict, List
+from functools import cached_property
+from typing import Dict, Iterable, List, Sequence, Tuple
 
+from utils.input_reader import Source, parse_args, read_lines
+from utils.instrumentation import profiled
 from utils.interfaces import IParsable
-from utils.utils import parse_value_between_strings
+from utils.parse_cache import load_or_parse, memoized_parse
+from utils.utils import find_between
 
 
+# The same handfuls come up again and again, so they are only parsed once
+@memoized_parse()
 @dataclass(frozen=True)
 class Handful(IParsable):
     blue: int
@@ -37,12 +44,10 @@ class Game(IParsable):
 
     @classmethod
     def parse(cls, string: str) -> "Game":
-        game_id = parse_value_between_strings(
-            string, before="Game ", after=":", parse=int
-        )
-        raw_handfuls = string[len(f"Game {game_id}: ") :]
+        id_start, id_end = find_between(string, before="Game ", after=": ")
+        raw_handfuls = string[id_end + len(": ") :]
         return Game(
-            game_id,
+            int(string[id_start:id_end]),
             [Handful.parse(raw_handful) for raw_handful in raw_handfuls.split("; ")],
         )
 
@@ -68,26 +73,142 @@ class Constraint:
         )
 
 
+# Past this many cells, the cumulative table for batched queries would take too much memory
+MAX_CUMULATIVE_CELLS = 10**7
+
+
+def _accumulate_along_axis(table: "array[int]", stride: int, size: int) -> None:
+    """
+    Replaces each cell of a flattened table with the sum of the cells up to it along one axis.
+    :param stride: the distance between consecutive cells along the axis
+    :param size: the number of cells along the axis
+    """
+    for i in range(stride, len(table)):
+        if i // stride % size:
+            table[i] += table[i - stride]
+
+
+@dataclass(frozen=True)
+class GameColumns:
+    """
+    Games reduced to their minimum sets as they are read, and stored column by column: element i
+    of each array belongs to the same game. A game is possible under a constraint exactly when
+    its minimum set is, so the handfuls themselves are not kept.
+    """
+
+    game_ids: "array[int]"
+    max_blues: "array[int]"
+    max_reds: "array[int]"
+    max_greens: "array[int]"
+
+    @classmethod
+    def from_games(cls, games: Iterable[Game]) -> "GameColumns":
+        columns = GameColumns(array("L"), array("L"), array("L"), array("L"))
+        for game in games:
+            minimum_set = game.minimum_set_for_game_to_be_possible()
+            columns.game_ids.append(game.game_id)
+            columns.max_blues.append(minimum_set.blue)
+            columns.max_reds.append(minimum_set.red)
+            columns.max_greens.append(minimum_set.green)
+
+        return columns
+
+    def possible_game_id_sum(self, constraint: Constraint) -> int:
+        return sum(
+            game_id
+            for game_id, blue, red, green in zip(
+                self.game_ids, self.max_blues, self.max_reds, self.max_greens
+            )
+            if blue <= constraint.max_blue
+            and red <= constraint.max_red
+            and green <= constraint.max_green
+        )
+
+    @cached_property
+    def _cumulative_id_sums(
+        self,
+    ) -> Tuple[List[int], List[int], List[int], "array[int]"]:
+        """
+        The distinct maxima of each colour, and a table whose cell (b, r, g) holds the sum of the
+        IDs of the games whose maxima are at most the b-th, r-th and g-th distinct blue, red and
+        green maxima (with 0 meaning below the smallest), flattened in that order.
+        """
+        blues = sorted(set(self.max_blues))
+        reds = sorted(set(self.max_reds))
+        greens = sorted(set(self.max_greens))
+        num_reds, num_greens = len(reds) + 1, len(greens) + 1
+        sums = array("q", bytes(8 * (len(blues) + 1) * num_reds * num_greens))
+        for game_id, blue, red, green in zip(
+            self.game_ids, self.max_blues, self.max_reds, self.max_greens
+        ):
+            b, r, g = (
+                bisect_right(blues, blue),
+                bisect_right(reds, red),
+                bisect_right(greens, green),
+            )
+            sums[(b * num_reds + r) * num_greens + g] += game_id
+
+        # Prefix sums along each axis in turn make every cell cumulative over all three
+        _accumulate_along_axis(sums, stride=num_reds * num_greens, size=len(blues) + 1)
+        _accumulate_along_axis(sums, stride=num_greens, size=num_reds)
+        _accumulate_along_axis(sums, stride=1, size=num_greens)
+        return blues, reds, greens, sums
+
+    def possible_game_id_sums(self, constraints: Sequence[Constraint]) -> List[int]:
+        """
+        Answers many constraints at once. After a table of cumulative sums over the distinct
+        colour maxima is built, each constraint costs three binary searches rather than a pass
+        over every game.
+        """
+        num_cells = (
+            (len(set(self.max_blues)) + 1)
+            * (len(set(self.max_reds)) + 1)
+            * (len(set(self.max_greens)) + 1)
+        )
+        if len(constraints) <= 1 or num_cells > MAX_CUMULATIVE_CELLS:
+            return [self.possible_game_id_sum(constraint) for constraint in constraints]
+
+        blues, reds, greens, sums = self._cumulative_id_sums
+        num_reds, num_greens = len(reds) + 1, len(greens) + 1
+        return [
+            sums[
+                (
+                    bisect_right(blues, constraint.max_blue) * num_reds
+                    + bisect_right(reds, constraint.max_red)
+                )
+                * num_greens
+                + bisect_right(greens, constraint.max_green)
+            ]
+            for constraint in constraints
+        ]
+
+    def minimum_set_power_sum(self) -> int:
+        return sum(
+            blue * red * green
+            for blue, red, green in zip(self.max_blues, self.max_reds, self.max_greens)
+        )
+
+
+def parse_game_columns(source: Source) -> GameColumns:
+    return GameColumns.from_games(Game.parse(line) for line in read_lines(source))
+
+
+@profiled
 def main() -> None:
-    games = [
-        Game.parse(line)
-        for line in Path("input/input.txt").read_text("utf-8").split("\n")
-    ]
+    args = parse_args(__file__)
+    games = (
+        load_or_parse(args.input, parse_game_columns)
+        if args.parse_cache
+        else parse_game_columns(args.input)
+    )
     constraint = Constraint(max_blue=14, max_red=12, max_green=13)
-    possible_games = [
-        game
-        for game in games
-        if not any(constraint.breached(handful) for handful in game.handfuls)
-    ]
+
     print(
-        "The sum of the possible game IDs is"
-        f" {sum(game.game_id for game in possible_games)}"
+        f"The sum of the possible game IDs is {games.possible_game_id_sum(constraint)}"
     )
-
-    minimum_sets = [game.minimum_set_for_game_to_be_possible() for game in games]
     print(
-        "The sum of the power of all the minimum sets is "
-        f"{sum(minimum_set.power() for minimum_set in minimum_sets)}"
+        "The sum of the power of all the minimum sets is"
+        f" {games.minimum_set_power_sum()}"
     )
 
 
@@ -1,10 +1,20 @@
+import re
+from argparse import ArgumentParser
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from itertools import chain
 from math import prod
-from pathlib import Path
-from typing import List, Optional, Set, Type
+from typing import Iterable, Iterator, List, Optional, Set, Tuple, Type
 
 from day3.interfaces import IValueAndCoordinate
+from utils.input_reader import parse_args, read_lines
+from utils.instrumentation import hot, profiled, timed
 
 NON_SYMBOLS = {"."}.union({str(i) for i in range(10)})
+NUMBER_PATTERN = re.compile(r"\d+")
+SYMBOL_PATTERN = re.compile(r"[^.\d]")
+NO_NUMBER = -1
 
 
 class SymbolAndCoordinate(IValueAndCoordinate):
@@ -111,43 +121,201 @@ def get_maybe_gear_ratio(
     )
 
 
-def main() -> None:
-    schematic = Path("input/input.txt").read_text("utf-8").split("\n")
-    numbers_and_coordinates = set()
-    symbols_and_coordinates = set()
-    for y, row in enumerate(schematic):
-        for x, _ in enumerate(row):
-            maybe_number_and_coordinate = NumberAndCoordinate.try_parse_from_schematic(
-                schematic, x, y
+@dataclass(frozen=True)
+class SchematicIndex:
+    """
+    Every number and symbol in a schematic, found in a single pass over the grid.
+    number_ids[y][x] is the index into numbers of the number covering (x, y), or NO_NUMBER, so
+    finding the numbers adjacent to a symbol only needs the 8 cells around it.
+    """
+
+    numbers: List[NumberAndCoordinate]
+    symbols: List[SymbolAndCoordinate]
+    number_ids: List["array[int]"]
+
+    @classmethod
+    def build(cls, schematic: Iterable[str]) -> "SchematicIndex":
+        index = SchematicIndex(numbers=[], symbols=[], number_ids=[])
+        for y, row in enumerate(schematic):
+            row_number_ids = array("i", [NO_NUMBER]) * len(row)
+            for match in NUMBER_PATTERN.finditer(row):
+                row_number_ids[match.start() : match.end()] = array(
+                    "i", [len(index.numbers)]
+                ) * len(match.group())
+                index.numbers.append(
+                    NumberAndCoordinate(
+                        value=int(match.group()),
+                        x=match.start(),
+                        y=y,
+                        length=len(match.group()),
+                    )
+                )
+            index.number_ids.append(row_number_ids)
+            index.symbols.extend(
+                SymbolAndCoordinate(value=match.group(), x=match.start(), y=y, length=1)
+                for match in SYMBOL_PATTERN.finditer(row)
             )
-            if maybe_number_and_coordinate is not None:
-                numbers_and_coordinates.add(maybe_number_and_coordinate)
+
+        return index
+
+    @hot
+    def adjacent_number_ids(
+        self, symbol_and_coordinate: SymbolAndCoordinate
+    ) -> Set[int]:
+        number_ids = set()
+        for y in range(symbol_and_coordinate.y - 1, symbol_and_coordinate.y + 2):
+            if not 0 <= y < len(self.number_ids):
+                continue
+            row_number_ids = self.number_ids[y]
+            for x in range(symbol_and_coordinate.x - 1, symbol_and_coordinate.x + 2):
+                if 0 <= x < len(row_number_ids) and row_number_ids[x] != NO_NUMBER:
+                    number_ids.add(row_number_ids[x])
+
+        return number_ids
+
+    def part_numbers(self) -> List[NumberAndCoordinate]:
+        part_number_ids: Set[int] = set()
+        for symbol_and_coordinate in self.symbols:
+            part_number_ids.update(self.adjacent_number_ids(symbol_and_coordinate))
+
+        return [self.numbers[number_id] for number_id in sorted(part_number_ids)]
+
+    def gear_ratios(self) -> List[int]:
+        gear_ratios = []
+        for symbol_and_coordinate in self.symbols:
+            if symbol_and_coordinate.value != "*":
                 continue
+            number_ids = self.adjacent_number_ids(symbol_and_coordinate)
+            if len(number_ids) == 2:
+                gear_ratios.append(prod(self.numbers[i].value for i in number_ids))
+
+        return gear_ratios
 
-            maybe_symbol_and_coordinate = SymbolAndCoordinate.try_parse_from_schematic(
-                schematic, x, y
+
+@dataclass(frozen=True)
+class SchematicRow:
+    """
+    The numbers and symbols in one row of a schematic, each sorted by x.
+    """
+
+    numbers: List[NumberAndCoordinate]
+    number_xs: List[int]
+    symbols: List[SymbolAndCoordinate]
+    symbol_xs: List[int]
+
+    @hot
+    @classmethod
+    def parse(cls, row: str, y: int) -> "SchematicRow":
+        numbers = [
+            NumberAndCoordinate(
+                value=int(match.group()),
+                x=match.start(),
+                y=y,
+                length=len(match.group()),
             )
-            if maybe_symbol_and_coordinate is not None:
-                symbols_and_coordinates.add(maybe_symbol_and_coordinate)
-
-    part_numbers = [
-        number_and_coordinate
-        for number_and_coordinate in numbers_and_coordinates
-        if is_part_number(schematic, number_and_coordinate)
-    ]
-    print(f"The sum of all {len(part_numbers)} part numbers:")
-    print(sum(part_number.value for part_number in part_numbers))
-
-    gear_ratios = [
-        maybe_gear_ratio
-        for maybe_gear_ratio in [
-            get_maybe_gear_ratio(schematic, symbol_and_coordinate)
-            for symbol_and_coordinate in symbols_and_coordinates
+            for match in NUMBER_PATTERN.finditer(row)
         ]
-        if maybe_gear_ratio is not None
-    ]
-    print(f"The sum of all {len(gear_ratios)} gear ratios:")
-    print(sum(gear_ratio for gear_ratio in gear_ratios))
+        symbols = [
+            SymbolAndCoordinate(value=match.group(), x=match.start(), y=y, length=1)
+            for match in SYMBOL_PATTERN.finditer(row)
+        ]
+        return SchematicRow(
+            numbers=numbers,
+            number_xs=[number.x for number in numbers],
+            symbols=symbols,
+            symbol_xs=[symbol.x for symbol in symbols],
+        )
+
+    def has_symbol_adjacent_to(
+        self, number_and_coordinate: NumberAndCoordinate
+    ) -> bool:
+        i = bisect_left(self.symbol_xs, number_and_coordinate.x - 1)
+        return (
+            i < len(self.symbol_xs)
+            and self.symbol_xs[i]
+            <= number_and_coordinate.x + number_and_coordinate.length
+        )
+
+    def numbers_adjacent_to(self, x: int) -> Iterator[NumberAndCoordinate]:
+        # Numbers never overlap, so once a number ends left of x - 1, every earlier one does too
+        i = bisect_right(self.number_xs, x + 1)
+        while i > 0 and self.numbers[i - 1].x + self.numbers[i - 1].length >= x:
+            i -= 1
+            yield self.numbers[i]
+
+
+def stream_parts_and_gears(
+    schematic: Iterable[str],
+) -> Iterator[Tuple[List[NumberAndCoordinate], List[int]]]:
+    """
+    Yields the part numbers and gear ratios of each row of the schematic, in the same order as
+    SchematicIndex. A row's are yielded as soon as the row below it has been read, and only
+    three rows are held at a time, so memory depends on the width of the schematic but not on
+    its height.
+    """
+    above: Optional[SchematicRow] = None
+    current: Optional[SchematicRow] = None
+    rows = (SchematicRow.parse(row, y) for y, row in enumerate(schematic))
+    for below in chain(rows, [None]):
+        if current is not None:
+            # A generator's own calls cannot be timed, so time each row's work instead
+            with timed("stream_parts_and_gears row"):
+                window = [row for row in (above, current, below) if row is not None]
+                part_numbers = [
+                    number
+                    for number in current.numbers
+                    if any(row.has_symbol_adjacent_to(number) for row in window)
+                ]
+                gear_ratios = []
+                for symbol in current.symbols:
+                    if symbol.value != "*":
+                        continue
+                    adjacent_numbers = [
+                        number
+                        for row in window
+                        for number in row.numbers_adjacent_to(symbol.x)
+                    ]
+                    if len(adjacent_numbers) == 2:
+                        gear_ratios.append(
+                            prod(number.value for number in adjacent_numbers)
+                        )
+            yield part_numbers, gear_ratios
+
+        above, current = current, below
+
+
+def add_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="hold only three rows of the schematic in memory at a time",
+    )
+
+
+@profiled
+def main() -> None:
+    args = parse_args(__file__, add_arguments=add_arguments)
+    if args.stream:
+        num_part_numbers = sum_of_part_numbers = 0
+        num_gear_ratios = sum_of_gear_ratios = 0
+        for part_numbers, gear_ratios in stream_parts_and_gears(read_lines(args.input)):
+            num_part_numbers += len(part_numbers)
+            sum_of_part_numbers += sum(number.value for number in part_numbers)
+            num_gear_ratios += len(gear_ratios)
+            sum_of_gear_ratios += sum(gear_ratios)
+    else:
+        index = SchematicIndex.build(read_lines(args.input))
+        part_numbers = index.part_numbers()
+        num_part_numbers = len(part_numbers)
+        sum_of_part_numbers = sum(part_number.value for part_number in part_numbers)
+        gear_ratios = index.gear_ratios()
+        num_gear_ratios = len(gear_ratios)
+        sum_of_gear_ratios = sum(gear_ratios)
+
+    print(f"The sum of all {num_part_numbers} part numbers:")
+    print(sum_of_part_numbers)
+    print(f"The sum of all {num_gear_ratios} gear ratios:")
+    print(sum_of_gear_ratios)
 
 
 if __name__ == "__main__":
@@ -1,66 +1,110 @@
-from dataclasses import dataclass
-from pathlib import Path
-from typing import Dict, List, Set
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Iterator, List, Set, Tuple
 
+from utils.input_reader import parse_args, read_lines
+from utils.instrumentation import profiled
 from utils.interfaces import IParsable
-from utils.utils import parse_value_between_strings
+from utils.utils import find_between
+
+
+def to_bitmask(numbers: Iterable[int]) -> int:
+    mask = 0
+    for number in numbers:
+        mask |= 1 << number
+    return mask
+
+
+def from_bitmask(mask: int) -> Set[int]:
+    return {number for number in range(mask.bit_length()) if mask >> number & 1}
 
 
 @dataclass
 class Card(IParsable):
     card_id: int
-    _winning_numbers: Set[int]
-    _your_numbers: Set[int]
+    _winning_numbers: int
+    _your_numbers: int
+    num_winning_numbers: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        # Numbers are stored as bitmasks, so matching is a single AND and a popcount
+        self.num_winning_numbers = bin(
+            self._winning_numbers & self._your_numbers
+        ).count("1")
 
     @classmethod
     def parse(cls, string: str) -> "Card":
-        card_id = parse_value_between_strings(
-            string, "Card", ":", lambda v: int(v.strip())
+        id_start, id_end = find_between(string, "Card", ":")
+        separator_idx = string.index("|", id_end)
+        winning_numbers = to_bitmask(
+            int(num) for num in string[id_end + 1 : separator_idx].split()
+        )
+        your_numbers = to_bitmask(
+            int(num) for num in string[separator_idx + 1 :].split()
         )
-        string = string[string.find(":") + 1 :]
-        raw_winning_numbers, raw_your_numbers = string.split(" | ")
-        winning_numbers = {int(num) for num in raw_winning_numbers.split()}
-        your_numbers = {int(num) for num in raw_your_numbers.split()}
 
         return Card(
-            card_id=card_id,
+            # int ignores the padding around the card ID
+            card_id=int(string[id_start:id_end]),
             _winning_numbers=winning_numbers,
             _your_numbers=your_numbers,
         )
 
     @property
     def your_winning_numbers(self) -> Set[int]:
-        return self._winning_numbers.intersection(self._your_numbers)
+        return from_bitmask(self._winning_numbers & self._your_numbers)
 
     def get_points(self) -> int:
-        if len(self.your_winning_numbers) == 0:
+        if self.num_winning_numbers == 0:
             return 0
-        return 2 ** (len(self.your_winning_numbers) - 1)
+        return 2 ** (self.num_winning_numbers - 1)
 
 
-def process_cards(cards: List[Card]) -> Dict[int, int]:
-    card_id_to_num_copies = {card.card_id: 1 for card in cards}
-    for card in sorted(cards, key=lambda card: card.card_id):
-        num_copies = card_id_to_num_copies[card.card_id]
-        num_winning_numbers = len(card.your_winning_numbers)
-        for card_id in range(card.card_id + 1, card.card_id + num_winning_numbers + 1):
-            card_id_to_num_copies[card_id] += num_copies
+def iter_card_copies(cards: Iterable[Card]) -> Iterator[Tuple[Card, int]]:
+    """
+    Streams the number of copies of each card. Cards must arrive in ascending, consecutive card_id
+    order. The copies won by upcoming cards are tracked as a difference array relative to the
+    next card, so each card costs O(1) regardless of how many cards it wins, and memory is
+    bounded by the largest number of winning numbers on a card rather than by the number of cards.
+    """
+    copy_differences: Deque[int] = deque()
+    won_copies = 0
+    for card in cards:
+        won_copies += copy_differences.popleft() if copy_differences else 0
+        num_copies = 1 + won_copies
+
+        # Each of the next num_winning_numbers cards gains num_copies copies
+        if card.num_winning_numbers > 0:
+            while len(copy_differences) <= card.num_winning_numbers:
+                copy_differences.append(0)
+            copy_differences[0] += num_copies
+            copy_differences[card.num_winning_numbers] -= num_copies
 
-    return card_id_to_num_copies
+        yield card, num_copies
 
 
+def process_cards(cards: List[Card]) -> Dict[int, int]:
+    return {
+        card.card_id: num_copies
+        for card, num_copies in iter_card_copies(
+            sorted(cards, key=lambda card: card.card_id)
+        )
+    }
+
+
+@profiled
 def main() -> None:
-    input_lines = Path("input/input.txt").read_text("utf-8").split("\n")
-    cards = [Card.parse(line) for line in input_lines if line != ""]
-    print(
-        "In total, the scratch cards are worth"
-        f" {sum(card.get_points() for card in cards)}"
-    )
-    card_id_to_num_copies = process_cards(cards)
+    args = parse_args(__file__)
+    total_points = 0
+    total_cards = 0
+    cards = (Card.parse(line) for line in read_lines(args.input) if line != "")
+    for card, num_copies in iter_card_copies(cards):
+        total_points += card.get_points()
+        total_cards += num_copies
+
+    print(f"In total, the scratch cards are worth {total_points}")
     print(
-        "After processing all cards, you end up with"
-        f" {sum(card_id_to_num_copies.values())} total"
-        " scratch cards"
+        f"After processing all cards, you end up with {total_cards} total scratch cards"
     )
 
 
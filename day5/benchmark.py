@@ -0,0 +1,137 @@
+import random
+from argparse import ArgumentParser
+from functools import partial
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, List
+
+from day5 import main as day5
+from utils.benchmark import time_batch, time_per_item
+from utils.input_reader import default_input_path, read_sections
+
+
+def check_batch_matches_reference(
+    seeds: List[int], source_to_map: Dict[str, day5.Map]
+) -> None:
+    expected = [day5.traverse(seed, source_to_map) for seed in seeds]
+    assert list(day5.traverse_array(seeds, source_to_map)) == expected
+    seed_to_location = day5.compose(day5.map_chain(source_to_map))
+    assert list(seed_to_location.map_array(seeds)) == expected
+
+
+def check_overlapping_sources_first_wins(rng: random.Random) -> None:
+    """
+    Mapping a range sends each number where map(int) sends it: where RangeMap sources overlap,
+    the first RangeMap covering a number maps it and later ones do not.
+    """
+    overlapping = day5.Map.parse("a-to-b map:\n100 0 10\n200 5 10")
+    assert overlapping.map(day5.NumberRange(0, 15)) == [
+        day5.NumberRange(100, 10),
+        day5.NumberRange(205, 5),
+    ]
+
+    for _ in range(10**3):
+        range_maps = "\n".join(
+            f"{rng.randint(0, 100)} {rng.randint(0, 50)} {rng.randint(1, 20)}"
+            for _ in range(rng.randint(1, 5))
+        )
+        m = day5.Map.parse(f"a-to-b map:\n{range_maps}")
+        number_range = day5.NumberRange(rng.randint(0, 60), rng.randint(1, 30))
+        mapped = sorted(
+            num
+            for output_range in m.map(number_range)
+            for num in range(output_range.start, output_range.end + 1)
+        )
+        expected = sorted(
+            m.map(num) for num in range(number_range.start, number_range.end + 1)
+        )
+        assert mapped == expected
+
+
+def traverse_in_parallel(
+    seed_ranges: List[day5.NumberRange],
+    source_to_map: Dict[str, day5.Map],
+    workers: int,
+) -> day5.RangeSet:
+    return day5.parallel_traverse_range(
+        day5.RangeSet.of(seed_ranges), source_to_map, workers
+    )
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Compare layered and composed seed to location traversal"
+    )
+    parser.add_argument("input", nargs="?", default=str(default_input_path(__file__)))
+    parser.add_argument("--seeds", type=int, default=10**6)
+    parser.add_argument("--seed-ranges", type=int, default=10**4)
+    parser.add_argument("--random-seed", type=int, default=2023)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4],
+        help="process counts to time parallel_traverse_range with",
+    )
+    args = parser.parse_args()
+
+    sections = read_sections(Path(args.input))
+    seeds = day5.parse_seeds_as_ints(next(sections))
+    source_to_map = {
+        m.source: m for m in (day5.Map.parse(section) for section in sections)
+    }
+
+    start = perf_counter()
+    seed_to_location = day5.compose(day5.map_chain(source_to_map))
+    print(
+        f"Composed {len(source_to_map)} maps into {len(seed_to_location.starts)}"
+        f" segments in {perf_counter() - start:.3f}s"
+    )
+
+    rng = random.Random(args.random_seed)
+    low, high = min(seeds), max(seeds)
+    point_seeds = [rng.randint(low, high) for _ in range(args.seeds)]
+    seed_ranges = [
+        day5.NumberRange(rng.randint(low, high), rng.randint(1, 10**8))
+        for _ in range(args.seed_ranges)
+    ]
+
+    check_batch_matches_reference(point_seeds[: 10**4], source_to_map)
+    check_overlapping_sources_first_wins(rng)
+
+    time_per_item(
+        "layered traverse",
+        point_seeds,
+        lambda seed: day5.traverse(seed, source_to_map),
+    )
+    time_per_item("composed map", point_seeds, seed_to_location.map)
+    time_batch(
+        "batched traverse_array",
+        point_seeds,
+        lambda seeds: day5.traverse_array(seeds, source_to_map),
+    )
+    time_batch("composed map_array", point_seeds, seed_to_location.map_array)
+    time_per_item(
+        "layered traverse_range",
+        seed_ranges,
+        lambda seed_range: day5.traverse_range(
+            day5.RangeSet.of([seed_range]), source_to_map
+        ),
+    )
+    time_per_item("composed map_range", seed_ranges, seed_to_location.map_range)
+
+    time_batch(
+        "traverse_range of all ranges",
+        seed_ranges,
+        lambda ranges: day5.traverse_range(day5.RangeSet.of(ranges), source_to_map),
+    )
+    for workers in args.workers:
+        time_batch(
+            f"parallel_traverse_range x{workers}",
+            seed_ranges,
+            partial(traverse_in_parallel, source_to_map=source_to_map, workers=workers),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
+import heapq
+import os
+import re
+from argparse import ArgumentParser
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from functools import singledispatchmethod
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+from functools import cached_property, singledispatchmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
+from utils.input_reader import Source, parse_args, read_sections
+from utils.instrumentation import profiled, timed
 from utils.interfaces import IParsable
-from utils.utils import flatten, parse_value_between_strings
+from utils.parse_cache import load_or_parse
+from utils.utils import iflatten
+
+MAP_HEADER_PATTERN = re.compile(r"(\w+)-to-(\w+) map:")
 
 
 @dataclass(frozen=True)
@@ -44,6 +55,107 @@ class NumberRange:
         ]
 
 
+@dataclass(frozen=True)
+class RangeSet:
+    """
+    A set of numbers stored as sorted, disjoint and non-adjacent ranges, so that a set has the
+    same ranges however it was built. Overlapping or touching ranges are merged as the set is
+    built, which keeps the number of ranges from growing as sets are mapped and combined. The
+    set operations walk the ranges of both sets in step, in time linear in their number.
+    """
+
+    ranges: List[NumberRange]
+
+    @classmethod
+    def of(cls, ranges: Iterable[NumberRange]) -> RangeSet:
+        return RangeSet.coalesce(
+            sorted(ranges, key=lambda number_range: number_range.start)
+        )
+
+    @classmethod
+    def coalesce(cls, ranges_by_start: Iterable[NumberRange]) -> RangeSet:
+        """
+        :param ranges_by_start: ranges sorted by start, which may overlap, touch or be empty
+        """
+        ranges: List[NumberRange] = []
+        for number_range in ranges_by_start:
+            if number_range.length <= 0:
+                continue
+            if ranges and number_range.start <= ranges[-1].end + 1:
+                last = ranges[-1]
+                if number_range.end > last.end:
+                    ranges[-1] = NumberRange(
+                        last.start, number_range.end - last.start + 1
+                    )
+            else:
+                ranges.append(number_range)
+
+        return RangeSet(ranges)
+
+    def __iter__(self) -> Iterator[NumberRange]:
+        return iter(self.ranges)
+
+    def __len__(self) -> int:
+        return len(self.ranges)
+
+    @property
+    def start(self) -> int:
+        return self.ranges[0].start
+
+    @cached_property
+    def _ends(self) -> List[int]:
+        return [number_range.end for number_range in self.ranges]
+
+    def lowest_at_or_after(self, num: int) -> Optional[int]:
+        """
+        :return: the lowest number in the set that is at least num, or None if there is none
+        """
+        i = bisect_left(self._ends, num)
+        if i == len(self.ranges):
+            return None
+        return max(num, self.ranges[i].start)
+
+    def union(self, other: RangeSet) -> RangeSet:
+        return RangeSet.coalesce(
+            heapq.merge(
+                self.ranges, other.ranges, key=lambda number_range: number_range.start
+            )
+        )
+
+    def intersection(self, other: RangeSet) -> RangeSet:
+        ranges = []
+        i = j = 0
+        while i < len(self.ranges) and j < len(other.ranges):
+            intersection = self.ranges[i].intersection(other.ranges[j])
+            if intersection is not None:
+                ranges.append(intersection)
+            if self.ranges[i].end < other.ranges[j].end:
+                i += 1
+            else:
+                j += 1
+
+        return RangeSet(ranges)
+
+    def difference(self, other: RangeSet) -> RangeSet:
+        ranges = []
+        j = 0
+        for number_range in self.ranges:
+            while j < len(other.ranges) and other.ranges[j].end < number_range.start:
+                j += 1
+            start = number_range.start
+            # Only the last range removed can reach into the next range, so this stays linear
+            k = j
+            while k < len(other.ranges) and other.ranges[k].start <= number_range.end:
+                if other.ranges[k].start > start:
+                    ranges.append(NumberRange(start, other.ranges[k].start - start))
+                start = max(start, other.ranges[k].end + 1)
+                k += 1
+            if start <= number_range.end:
+                ranges.append(NumberRange(start, number_range.end - start + 1))
+
+        return RangeSet(ranges)
+
+
 @dataclass(frozen=True)
 class RangeMap(IParsable):
     source: NumberRange
@@ -81,49 +193,249 @@ class RangeMap(IParsable):
         )
 
 
+# (start, offset, range map index) of a BreakpointTable segment
+Segment = Tuple[int, int, Optional[int]]
+
+
+def _append_segment(
+    segments: List[Segment], start: int, offset: int, range_map_index: Optional[int]
+) -> None:
+    # A segment mapping the same way as the one before it only extends that one
+    if segments and segments[-1][1:] == (offset, range_map_index):
+        return
+    segments.append((start, offset, range_map_index))
+
+
+@dataclass(frozen=True)
+class BreakpointTable:
+    """
+    A piecewise map from numbers to numbers stored as sorted, disjoint segments. Segment i covers
+    [starts[i], starts[i + 1]) (the last segment is unbounded) and shifts numbers by offsets[i];
+    numbers below starts[0] are unchanged. For a table built from a Map, range_map_indices[i] is
+    the index of the RangeMap responsible for the segment, or None if the segment is not covered
+    by any RangeMap. Where RangeMap sources overlap, the first RangeMap wins, as it does when
+    Map.map maps a single number. Ranges follow the same rule, so a number in an overlap is mapped
+    once, where the original range mapping mapped it once for every RangeMap covering it.
+    """
+
+    starts: List[int]
+    offsets: List[int]
+    range_map_indices: List[Optional[int]]
+
+    @classmethod
+    def from_range_maps(cls, range_maps: List[RangeMap]) -> "BreakpointTable":
+        boundaries = sorted(
+            {r.source.start for r in range_maps}
+            | {r.source.end + 1 for r in range_maps}
+        )
+        by_start = sorted(
+            range(len(range_maps)), key=lambda i: range_maps[i].source.start
+        )
+
+        segments: List[Segment] = []
+        active: List[int] = []  # heap of indices of the range_maps covering the segment
+        next_to_activate = 0
+        for boundary in boundaries:
+            while (
+                next_to_activate < len(by_start)
+                and range_maps[by_start[next_to_activate]].source.start <= boundary
+            ):
+                heapq.heappush(active, by_start[next_to_activate])
+                next_to_activate += 1
+            while active and range_maps[active[0]].source.end < boundary:
+                heapq.heappop(active)
+
+            if not active:
+                _append_segment(segments, boundary, 0, None)
+                continue
+            range_map = range_maps[active[0]]
+            _append_segment(
+                segments,
+                boundary,
+                range_map.destination.start - range_map.source.start,
+                active[0],
+            )
+
+        return cls.of_segments(segments)
+
+    @classmethod
+    def of_segments(cls, segments: List[Segment]) -> BreakpointTable:
+        """
+        :param segments: (start, offset, range map index) of each segment, sorted by start
+        """
+        return BreakpointTable(
+            starts=[start for start, _, _ in segments],
+            offsets=[offset for _, offset, _ in segments],
+            range_map_indices=[index for _, _, index in segments],
+        )
+
+    def segment_index(self, num: int) -> int:
+        return bisect_right(self.starts, num) - 1
+
+    def offset(self, segment_index: int) -> int:
+        return self.offsets[segment_index] if segment_index >= 0 else 0
+
+    def then(self, other: BreakpointTable) -> BreakpointTable:
+        """
+        :param other: the table to apply to the output of this one
+        :return: a single table equivalent to mapping through this table and then through other
+        """
+        segments: List[Segment] = []
+        for i in range(-1, len(self.starts)):
+            offset = self.offset(i)
+            end = self.starts[i + 1] if i + 1 < len(self.starts) else None
+
+            # Walk the segments of other that the image of this segment passes through
+            if i >= 0:
+                j = other.segment_index(self.starts[i] + offset)
+                _append_segment(
+                    segments, self.starts[i], offset + other.offset(j), None
+                )
+            else:
+                j = -1
+            j += 1
+            while j < len(other.starts) and (
+                end is None or other.starts[j] < end + offset
+            ):
+                _append_segment(
+                    segments, other.starts[j] - offset, offset + other.offsets[j], None
+                )
+                j += 1
+
+        return BreakpointTable.of_segments(segments)
+
+    def map(self, num: int) -> int:
+        i = self.segment_index(num)
+        if i < 0:
+            return num
+        return num + self.offsets[i]
+
+    @cached_property
+    def _offsets_by_insertion_point(self) -> List[int]:
+        return [0] + self.offsets
+
+    def map_array(self, nums: Iterable[int]) -> "array[int]":
+        """
+        Batch equivalent of map. The loop runs as a single comprehension over C-level bisect calls
+        with no per-number method dispatch, and the result is packed into an int64 array.
+        """
+        starts = self.starts
+        offsets = self._offsets_by_insertion_point
+        return array("q", [num + offsets[bisect_right(starts, num)] for num in nums])
+
+    def map_range(self, number_range: NumberRange) -> List[NumberRange]:
+        mapped_ranges: List[Tuple[int, NumberRange]] = []
+        unmapped_ranges: List[NumberRange] = []
+
+        i = self.segment_index(number_range.start)
+        start = number_range.start
+        while start <= number_range.end:
+            segment_end = (
+                self.starts[i + 1] - 1 if i + 1 < len(self.starts) else number_range.end
+            )
+            end = min(segment_end, number_range.end)
+            range_map_index = self.range_map_indices[i] if i >= 0 else None
+            output_range = NumberRange(start + self.offset(i), end - start + 1)
+            if range_map_index is None:
+                unmapped_ranges.append(output_range)
+            else:
+                mapped_ranges.append((range_map_index, output_range))
+            start = end + 1
+            i += 1
+
+        # Mapped ranges are reported in range_map order followed by the unmapped ranges in
+        # ascending order, the same order the per-RangeMap implementation produced them in
+        mapped_ranges.sort(key=lambda indexed_range: indexed_range[0])
+        return [mapped_range for _, mapped_range in mapped_ranges] + unmapped_ranges
+
+    @cached_property
+    def _segments_by_image_start(self) -> List[int]:
+        # Segment -1 is everything below starts[0], so its image starts lowest of all
+        return [-1] + sorted(
+            range(len(self.starts)), key=lambda i: self.starts[i] + self.offsets[i]
+        )
+
+    def lowest_image(self, range_set: RangeSet) -> Optional[int]:
+        """
+        Finds min(self.map(num) for num in range_set) without mapping all of range_set. The
+        segments are walked in ascending order of where their images start, and each is projected
+        back onto range_set to find the lowest number it maps. Images may overlap, so the walk
+        only stops at the first segment whose image starts above the lowest number found so far,
+        and the work depends on how early the answer appears rather than on the size of the
+        whole image.
+        :return: the lowest number range_set maps to, or None if range_set is empty
+        """
+        lowest = None
+        for i in self._segments_by_image_start:
+            if (
+                i >= 0
+                and lowest is not None
+                and self.starts[i] + self.offsets[i] >= lowest
+            ):
+                break
+            if i >= 0:
+                first = range_set.lowest_at_or_after(self.starts[i])
+            else:
+                first = range_set.start if range_set else None
+            if first is None or (
+                i + 1 < len(self.starts) and first >= self.starts[i + 1]
+            ):
+                continue
+            image = first + self.offset(i)
+            if lowest is None or image < lowest:
+                lowest = image
+
+        return lowest
+
+    def map_range_set(self, range_set: RangeSet) -> RangeSet:
+        return RangeSet.of(
+            iflatten(self.map_range(number_range) for number_range in range_set)
+        )
+
+
 @dataclass(frozen=True)
 class Map(IParsable):
     source: str
     destination: str
     range_maps: List[RangeMap]
 
+    @cached_property
+    def breakpoint_table(self) -> BreakpointTable:
+        return BreakpointTable.from_range_maps(self.range_maps)
+
     @singledispatchmethod
     def map(self, _: Any) -> Any:
         raise NotImplementedError
 
     @map.register(int)
     def _(self, num: int) -> int:
-        for range_map in self.range_maps:
-            maybe_mapped_value = range_map.try_map(num)
-            if maybe_mapped_value is not None:
-                return maybe_mapped_value
-
-        return num
+        return self.breakpoint_table.map(num)
 
     @map.register(NumberRange)
     def _(self, number_range: NumberRange) -> List[NumberRange]:
-        mapped_ranges = []
-        for range_map in self.range_maps:
-            maybe_output_range = range_map.try_map(number_range)
-            if maybe_output_range is not None:
-                mapped_ranges.append(maybe_output_range)
+        # Where RangeMap sources overlap, each number is mapped by the first RangeMap covering
+        # it, as in map(int), so the output ranges hold exactly the numbers map(int) gives
+        return self.breakpoint_table.map_range(number_range)
 
-        unmapped_ranges = [number_range]
-        for range_map in self.range_maps:
-            unmapped_ranges = flatten([
-                number_range.exceptwith(range_map.source)
-                for number_range in unmapped_ranges
-            ])
+    @map.register(RangeSet)
+    def _(self, range_set: RangeSet) -> RangeSet:
+        return self.breakpoint_table.map_range_set(range_set)
 
-        return mapped_ranges + unmapped_ranges
+    def map_array(self, nums: Iterable[int]) -> "array[int]":
+        return self.breakpoint_table.map_array(nums)
 
     @classmethod
     def parse(cls, string: str) -> "Map":
-        lines = string.split("\n")
+        header = MAP_HEADER_PATTERN.match(string)
+        assert header is not None, f"Could not find a map header in {string}"
         return Map(
-            source=parse_value_between_strings(lines[0], "", "-to-", str),
-            destination=parse_value_between_strings(lines[0], "-to-", " map:", str),
-            range_maps=[RangeMap.parse(line) for line in lines[1:]],
+            source=header[1],
+            destination=header[2],
+            range_maps=[
+                RangeMap.parse(line)
+                for line in string[header.end() :].splitlines()
+                if line
+            ],
         )
 
 
@@ -150,37 +462,159 @@ def traverse(seed: int, source_to_map: Dict[str, Map]) -> int:
     return value
 
 
-def traverse_range(
-    seed_range: NumberRange, source_to_map: Dict[str, Map]
-) -> List[NumberRange]:
+def traverse_array(seeds: Iterable[int], source_to_map: Dict[str, Map]) -> "array[int]":
+    source = "seed"
+    values = array("q", seeds)
+    while source != "location":
+        current_map = source_to_map[source]
+        source = current_map.destination
+        values = current_map.map_array(values)
+
+    return values
+
+
+def traverse_range(seed_ranges: RangeSet, source_to_map: Dict[str, Map]) -> RangeSet:
     source = "seed"
-    number_ranges = [seed_range]
+    number_ranges = seed_ranges
     while source != "location":
         current_map = source_to_map[source]
         source = current_map.destination
-        number_ranges = flatten([
-            current_map.map(input_range) for input_range in number_ranges
-        ])
+        number_ranges = current_map.map(number_ranges)
 
     return number_ranges
 
 
+# The maps each worker process traverses shards with, set once per worker by its initializer
+_worker_source_to_map: Dict[str, Map] = {}
+
+
+def _init_traverse_worker(source_to_map: Dict[str, Map]) -> None:
+    _worker_source_to_map.clear()
+    _worker_source_to_map.update(source_to_map)
+
+
+def _traverse_shard(shard: List[NumberRange]) -> RangeSet:
+    return traverse_range(RangeSet.of(shard), _worker_source_to_map)
+
+
+def shard_ranges(seed_ranges: RangeSet, num_shards: int) -> List[List[NumberRange]]:
+    """
+    Splits seed_ranges into up to num_shards shards covering roughly the same count of numbers
+    each, cutting ranges that are wider than a shard into sub-ranges.
+    """
+    total = sum(number_range.length for number_range in seed_ranges)
+    shard_size = max(1, -(-total // num_shards))
+    shards: List[List[NumberRange]] = [[]]
+    filled = 0
+    for number_range in seed_ranges:
+        start, remaining = number_range.start, number_range.length
+        while remaining > 0:
+            if filled == shard_size:
+                shards.append([])
+                filled = 0
+            length = min(remaining, shard_size - filled)
+            shards[-1].append(NumberRange(start, length))
+            start += length
+            remaining -= length
+            filled += length
+
+    return [shard for shard in shards if shard]
+
+
+def parallel_traverse_range(
+    seed_ranges: RangeSet,
+    source_to_map: Dict[str, Map],
+    workers: Optional[int] = None,
+    shards_per_worker: int = 4,
+) -> RangeSet:
+    """
+    Equivalent to traverse_range, with the seed ranges sharded across worker processes. Each
+    worker receives source_to_map once, when it starts, rather than with every shard, and the
+    location ranges of the shards are merged into one RangeSet as they come back.
+    :param workers: the number of worker processes (default: the number of CPUs)
+    :param shards_per_worker: more shards than workers keep every worker busy when some shards
+    cross far more segments than others
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shard_ranges(seed_ranges, workers * shards_per_worker)
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_traverse_worker,
+        initargs=(source_to_map,),
+    ) as executor:
+        return RangeSet.of(iflatten(executor.map(_traverse_shard, shards)))
+
+
+def map_chain(
+    source_to_map: Dict[str, Map], source: str = "seed", destination: str = "location"
+) -> List[Map]:
+    maps = []
+    while source != destination:
+        current_map = source_to_map[source]
+        source = current_map.destination
+        maps.append(current_map)
+
+    return maps
+
+
+def compose(maps: List[Map]) -> BreakpointTable:
+    """
+    Folds a chain of maps into a single piecewise map, so that traversing the whole chain costs
+    one lookup for a seed or one sweep for a seed range.
+    :param maps: the maps in the order they are applied, e.g. as returned by map_chain
+    """
+    composed = BreakpointTable(starts=[], offsets=[], range_map_indices=[])
+    for m in maps:
+        with timed("BreakpointTable.then"):
+            composed = composed.then(m.breakpoint_table)
+
+    return composed
+
+
+def parse_almanac(source: Source) -> Tuple[str, List[Map]]:
+    """
+    :return: the unparsed seeds section, which is read differently by each part, and the maps
+    """
+    sections = read_sections(source)
+    seeds_section = next(sections)
+    return seeds_section, [Map.parse(section) for section in sections]
+
+
+def add_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="traverse the seed ranges map by map across this many processes for part 2",
+    )
+
+
+@profiled
 def main() -> None:
-    sections = Path("input/input.txt").read_text("utf-8").split("\n\n")
-    seeds = parse_seeds_as_ints(sections[0])
-    maps = [Map.parse(section) for section in sections[1:]]
+    args = parse_args(__file__, add_arguments=add_arguments)
+    seeds_section, maps = (
+        load_or_parse(args.input, parse_almanac)
+        if args.parse_cache
+        else parse_almanac(args.input)
+    )
+    seeds = parse_seeds_as_ints(seeds_section)
     source_to_map = {m.source: m for m in maps}
+    seed_to_location = compose(map_chain(source_to_map))
 
-    lowest_location = min(traverse(seed, source_to_map) for seed in seeds)
+    lowest_location = min(seed_to_location.map_array(seeds))
     print(f"The lowest location number is {lowest_location}")
 
-    seeds_as_ranges = parse_seeds_as_number_ranges(sections[0])
-    location_ranges = flatten([
-        traverse_range(seed_range, source_to_map) for seed_range in seeds_as_ranges
-    ])
+    seeds_as_ranges = RangeSet.of(parse_seeds_as_number_ranges(seeds_section))
+    lowest_range_location: Optional[int]
+    if args.workers:
+        lowest_range_location = parallel_traverse_range(
+            seeds_as_ranges, source_to_map, args.workers
+        ).start
+    else:
+        with timed("BreakpointTable.lowest_image"):
+            lowest_range_location = seed_to_location.lowest_image(seeds_as_ranges)
     print(
         "Interpreting the seeds as ranges, the lowest location number is"
-        f" {min(r.start for r in location_ranges)}"
+        f" {lowest_range_location}"
     )
 
 
@@ -0,0 +1,49 @@
+import random
+from argparse import ArgumentParser
+from typing import List
+
+from day6 import main as day6
+from utils.benchmark import time_per_item
+
+
+def generate_races(
+    num_races: int, max_time: int, rng: random.Random
+) -> List[day6.Race]:
+    races = []
+    for _ in range(num_races):
+        time = rng.randint(0, max_time)
+        # Records around the best possible distance hit the edges of the closed form
+        best_distance = (time // 2) * (time - time // 2)
+        races.append(day6.Race(time=time, distance=rng.randint(0, best_distance + 1)))
+
+    return races
+
+
+def check_closed_form_matches_enumeration(races: List[day6.Race]) -> None:
+    for race in races:
+        assert (
+            len(race.winning_button_press_times()) == race.count_winning_times()
+        ), f"Closed form disagreed with enumeration for {race}"
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Check and time day6's closed form against enumerating every time"
+    )
+    parser.add_argument("--races", type=int, default=10**4)
+    parser.add_argument("--max-time", type=int, default=1000)
+    parser.add_argument("--random-seed", type=int, default=2023)
+    args = parser.parse_args()
+
+    races = generate_races(args.races, args.max_time, random.Random(args.random_seed))
+    check_closed_form_matches_enumeration(races)
+    time_per_item(
+        "winning_button_press_times",
+        races,
+        lambda race: len(race.winning_button_press_times()),
+    )
+    time_per_item("count_winning_times", races, day6.Race.count_winning_times)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
 from dataclasses import dataclass
-from math import prod
-from pathlib import Path
-from typing import List
+from math import isqrt, prod
+from typing import List, Optional, Tuple
+
+from utils.input_reader import parse_args, read_lines
+from utils.instrumentation import profiled
 
 
 @dataclass
@@ -9,6 +11,9 @@ class Race:
     time: int
     distance: int
 
+    def _beats_record(self, time_button_held: int) -> bool:
+        return time_button_held * (self.time - time_button_held) > self.distance
+
     def winning_button_press_times(self) -> List[int]:
         winning_times = []
         for time_button_held in range(self.time + 1):
@@ -19,23 +24,58 @@ class Race:
 
         return winning_times
 
+    def winning_button_press_interval(self) -> Optional[Tuple[int, int]]:
+        """
+        Solves h * (time - h) > distance for integer h in closed form. The winning times form a
+        contiguous interval that is symmetric about time / 2, so only the lower bound needs to be
+        found.
+        :return: The inclusive [lo, hi] interval of winning button press times, or None if the
+        record cannot be beaten.
+        """
+        discriminant = self.time * self.time - 4 * self.distance
+        if discriminant < 0:
+            return None
+
+        # isqrt floors, so the estimate can be off by one in either direction - nudge it onto the
+        # exact boundary using integer arithmetic only
+        lo = max((self.time - isqrt(discriminant)) // 2, 0)
+        while lo > 0 and self._beats_record(lo - 1):
+            lo -= 1
+        while lo <= self.time // 2 and not self._beats_record(lo):
+            lo += 1
+
+        hi = self.time - lo
+        if lo > hi:
+            return None
+
+        return lo, hi
+
+    def count_winning_times(self) -> int:
+        interval = self.winning_button_press_interval()
+        if interval is None:
+            return 0
+
+        lo, hi = interval
+        return hi - lo + 1
+
 
+@profiled
 def main() -> None:
-    input_lines = Path("input/input.txt").read_text("utf-8").split("\n")
+    args = parse_args(__file__)
+    input_lines = list(read_lines(args.input))
     times = [int(t) for t in input_lines[0][len("Time:") :].split()]
     distances = [int(d) for d in input_lines[1][len("Distance:") :].split()]
     races = [Race(time=t, distance=d) for t, d in zip(times, distances)]
-    winning_button_press_times = [race.winning_button_press_times() for race in races]
     print(
         "If you multiply the number of ways the record can be beaten for each race,"
-        f" you get {prod(len(times) for times in winning_button_press_times)}"
+        f" you get {prod(race.count_winning_times() for race in races)}"
     )
 
     single_race = Race(
         time=int("".join(str(t) for t in times)),
         distance=int("".join(str(d) for d in distances)),
     )
-    print(len(single_race.winning_button_press_times()))
+    print(single_race.count_winning_times())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+import random
+from argparse import ArgumentParser
+from functools import cmp_to_key
+from time import perf_counter
+from typing import List
+
+from day7 import main as day7
+from utils.benchmark import measure, report, time_batch
+
+
+def compare_by_type_then_cards(a: day7.Turn, b: day7.Turn) -> int:
+    """
+    Comparison used before hands had a rank key: the type is recomputed on every comparison.
+    """
+    if a.hand.type != b.hand.type:
+        return -1 if a.hand.type < b.hand.type else 1
+    for a_card, b_card in zip(a.hand.cards, b.hand.cards):
+        if a_card != b_card:
+            return -1 if a_card < b_card else 1
+
+    return 0
+
+
+def generate_turns(num_turns: int, rng: random.Random) -> List[str]:
+    return [
+        "".join(rng.choices(day7.CARDS_ORDER, k=5)) + f" {rng.randint(1, 1000)}"
+        for _ in range(num_turns)
+    ]
+
+
+def benchmark_sorting(
+    lines: List[str], joker_enabled: bool, comparison_hands: int
+) -> None:
+    comparison_turns = [
+        day7.Turn.parse(line, joker_enabled) for line in lines[:comparison_hands]
+    ]
+    time_batch(
+        "per-comparison type sort",
+        comparison_turns,
+        lambda turns: sorted(turns, key=cmp_to_key(compare_by_type_then_cards)),
+    )
+    by_comparison = sorted(comparison_turns, key=cmp_to_key(compare_by_type_then_cards))
+    by_rank_key = sorted(comparison_turns, key=lambda turn: turn.rank_key)
+    assert [t.hand.cards for t in by_rank_key] == [
+        t.hand.cards for t in by_comparison
+    ], "rank_key ordering differs from comparing by type then cards"
+
+    start = perf_counter()
+    turns = [day7.Turn.parse(line, joker_enabled) for line in lines]
+    report("parse", len(turns), perf_counter() - start)
+    time_batch(
+        "rank_key sort",
+        turns,
+        lambda turns: sorted(turns, key=lambda turn: turn.rank_key),
+    )
+    time_batch("__lt__ sort with cached keys", turns, sorted)
+
+
+def benchmark_storage(lines: List[str], joker_enabled: bool) -> None:
+    winnings = measure(
+        "Turn.parse total winnings",
+        len(lines),
+        lambda: day7.total_winnings(
+            [day7.Turn.parse(line, joker_enabled) for line in lines]
+        ),
+    )
+    compact_winnings = measure(
+        "CompactHands total winnings",
+        len(lines),
+        lambda: day7.CompactHands.parse(lines, joker_enabled).total_winnings(),
+    )
+    assert winnings == compact_winnings, "CompactHands winnings differ from Turn"
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Compare ways of ranking day7 hands")
+    parser.add_argument("--hands", type=int, default=10**6)
+    parser.add_argument(
+        "--comparison-hands",
+        type=int,
+        default=10**4,
+        help="number of hands to sort with the per-comparison type, which is much slower",
+    )
+    parser.add_argument("--random-seed", type=int, default=2023)
+    args = parser.parse_args()
+
+    rng = random.Random(args.random_seed)
+    lines = generate_turns(args.hands, rng)
+
+    for joker_enabled in (False, True):
+        print(f"{joker_enabled=}")
+        benchmark_sorting(lines, joker_enabled, args.comparison_hands)
+        benchmark_storage(lines, joker_enabled)
+
+
+if __name__ == "__main__":
+    main()
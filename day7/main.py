@@ -1,12 +1,23 @@
+from array import array
 from collections import Counter
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
-from functools import total_ordering
-from pathlib import Path
-from typing import List
+from functools import cached_property, lru_cache, total_ordering
+from typing import Collection, Iterable, Iterator, List
+
+from utils.input_reader import Source, parse_args, read_lines
+from utils.instrumentation import hot, profiled
+from utils.parse_cache import load_or_parse
 
 CARDS_ORDER = "AKQJT98765432"
 JOKER_ENABLED_CARDS_ORDER = "AKQT98765432J"
+NUM_RANKS = len(CARDS_ORDER)
+HAND_SIZE = 5
+JOKER_RANK = 0
+RANKS = bytes.maketrans(CARDS_ORDER.encode(), bytes(reversed(range(NUM_RANKS))))
+JOKER_ENABLED_RANKS = bytes.maketrans(
+    JOKER_ENABLED_CARDS_ORDER.encode(), bytes(reversed(range(NUM_RANKS)))
+)
 
 
 @total_ordering
@@ -22,6 +33,26 @@ class Type(Enum):
     def __lt__(self, other: "Type") -> bool:
         return other.value < self.value
 
+    @classmethod
+    def from_occurrences(cls, occurrences: Collection[int]) -> "Type":
+        """
+        :param occurrences: the number of times each distinct card occurs in a hand
+        """
+        if 5 in occurrences:
+            return Type.FIVE_OF_A_KIND
+        if 4 in occurrences:
+            return Type.FOUR_OF_A_KIND
+        if 3 in occurrences and 2 in occurrences:
+            return Type.FULL_HOUSE
+        if 3 in occurrences:
+            return Type.THREE_OF_A_KIND
+        if len([o for o in occurrences if o == 2]) == 2:
+            return Type.TWO_PAIR
+        if 2 in occurrences:
+            return Type.ONE_PAIR
+
+        return Type.HIGH_CARD
+
 
 @total_ordering
 @dataclass(frozen=True)
@@ -36,9 +67,16 @@ class Card:
 
         return Card(string, joker_enabled)
 
-    def __lt__(self, other: "Card") -> bool:
+    @property
+    def rank(self) -> int:
+        """
+        :return: the strength of the card from 0 (weakest) to NUM_RANKS - 1 (strongest)
+        """
         card_order = JOKER_ENABLED_CARDS_ORDER if self.joker_enabled else CARDS_ORDER
-        return card_order.index(other.card) < card_order.index(self.card)
+        return NUM_RANKS - 1 - card_order.index(self.card)
+
+    def __lt__(self, other: "Card") -> bool:
+        return self.rank < other.rank
 
 
 @total_ordering
@@ -59,21 +97,7 @@ class Hand:
             self.JOKER not in self.cards
         ), "Called _type_without_jokers on a Hand that had jokers"
 
-        occurrences = Counter(self.cards).values()
-        if 5 in occurrences:
-            return Type.FIVE_OF_A_KIND
-        if 4 in occurrences:
-            return Type.FOUR_OF_A_KIND
-        if 3 in occurrences and 2 in occurrences:
-            return Type.FULL_HOUSE
-        if 3 in occurrences:
-            return Type.THREE_OF_A_KIND
-        if len([o for o in occurrences if o == 2]) == 2:
-            return Type.TWO_PAIR
-        if 2 in occurrences:
-            return Type.ONE_PAIR
-
-        return Type.HIGH_CARD
+        return Type.from_occurrences(Counter(self.cards).values())
 
     @property
     def type(self) -> Type:
@@ -92,15 +116,21 @@ class Hand:
             + [c for c in self.cards if c != self.JOKER]
         ).type
 
-    def __lt__(self, other: "Hand") -> bool:
-        if self.type != other.type:
-            return self.type < other.type
+    @cached_property
+    def rank_key(self) -> int:
+        """
+        Packs the hand's strength into a single integer that orders hands the same way as comparing
+        by type and then card by card: the type's strength sits above the card ranks, which are
+        packed base NUM_RANKS with the first card most significant. Computed once per hand.
+        """
+        key = len(Type) - 1 - self.type.value
+        for card in self.cards:
+            key = key * NUM_RANKS + card.rank
 
-        for self_card, other_card in zip(self.cards, other.cards):
-            if self_card != other_card:
-                return self_card < other_card
+        return key
 
-        return False
+    def __lt__(self, other: "Hand") -> bool:
+        return self.rank_key < other.rank_key
 
 
 @total_ordering
@@ -114,27 +144,110 @@ class Turn:
         h, b = string.split()
         return Turn(Hand.parse(h, joker_enabled), int(b))
 
+    @property
+    def rank_key(self) -> int:
+        return self.hand.rank_key
+
     def __lt__(self, other: "Turn") -> bool:
         return self.hand < other.hand
 
 
+def total_winnings(turns: List[Turn]) -> int:
+    sorted_turns = sorted(turns, key=lambda turn: turn.rank_key)
+    return sum(turn.bid * (rank + 1) for rank, turn in enumerate(sorted_turns))
+
+
+@lru_cache(maxsize=None)
+def _type_of_sorted_ranks(sorted_ranks: bytes, joker_enabled: bool) -> Type:
+    # Keyed on the sorted ranks, so there are only as many entries as multisets of HAND_SIZE
+    # ranks. Jokers always join the most common other card.
+    occurrences = Counter(sorted_ranks)
+    num_jokers = occurrences.pop(JOKER_RANK, 0) if joker_enabled else 0
+    counts = sorted(occurrences.values(), reverse=True) or [0]
+    counts[0] += num_jokers
+    return Type.from_occurrences(counts)
+
+
+@dataclass(frozen=True)
+class CompactHands:
+    """
+    A set of turns stored without a Python object per card or hand: each hand is HAND_SIZE bytes
+    of cards and each bid is an entry of an unsigned int array. Whether J is a joker is decided
+    for the whole set, so both rules can share the same storage through with_jokers.
+    """
+
+    cards: bytearray
+    bids: "array[int]"
+    joker_enabled: bool = False
+
+    @classmethod
+    def parse(cls, lines: Iterable[str], joker_enabled: bool = False) -> "CompactHands":
+        hands = CompactHands(bytearray(), array("L"), joker_enabled)
+        for line in lines:
+            h, b = line.split()
+            assert (
+                len(h) == HAND_SIZE and h.strip(CARDS_ORDER) == ""
+            ), f"Expected {h} to be {HAND_SIZE} of {CARDS_ORDER}"
+            hands.cards.extend(h.encode())
+            hands.bids.append(int(b))
+
+        return hands
+
+    def __len__(self) -> int:
+        return len(self.bids)
+
+    def with_jokers(self, joker_enabled: bool) -> "CompactHands":
+        return replace(self, joker_enabled=joker_enabled)
+
+    def rank_codes(self) -> Iterator[bytes]:
+        """
+        :return: each hand's card ranks, one byte per card with 0 the weakest
+        """
+        ranks = self.cards.translate(
+            JOKER_ENABLED_RANKS if self.joker_enabled else RANKS
+        )
+        return (
+            bytes(ranks[i : i + HAND_SIZE]) for i in range(0, len(ranks), HAND_SIZE)
+        )
+
+    @hot
+    def rank_keys(self) -> List[int]:
+        """
+        :return: for each hand, an integer that orders hands the same way as Hand.rank_key
+        """
+        keys = []
+        for rank_code in self.rank_codes():
+            hand_type = _type_of_sorted_ranks(
+                bytes(sorted(rank_code)), self.joker_enabled
+            )
+            type_strength = len(Type) - 1 - hand_type.value
+            keys.append(
+                (type_strength << (8 * HAND_SIZE)) | int.from_bytes(rank_code, "big")
+            )
+
+        return keys
+
+    def total_winnings(self) -> int:
+        keys = self.rank_keys()
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        return sum(self.bids[i] * (rank + 1) for rank, i in enumerate(order))
+
+
+def parse_hands(source: Source) -> CompactHands:
+    return CompactHands.parse(read_lines(source))
+
+
+@profiled
 def main() -> None:
-    input_lines = Path("input/input.txt").read_text("utf-8").split("\n")
-    turns = [Turn.parse(t) for t in input_lines if t != ""]
-    sorted_turns = sorted(turns)
-    print(
-        "Total winnings:"
-        f" {sum(turn.bid * (rank + 1) for rank, turn in enumerate(sorted_turns))}"
+    args = parse_args(__file__)
+    hands = (
+        load_or_parse(args.input, parse_hands)
+        if args.parse_cache
+        else parse_hands(args.input)
     )
 
-    joker_enabled_turns = [
-        Turn.parse(t, joker_enabled=True) for t in input_lines if t != ""
-    ]
-    sorted_joker_enabled_turns = sorted(joker_enabled_turns)
-    print(
-        "Total winnings:"
-        f" {sum(turn.bid * (rank + 1) for rank, turn in enumerate(sorted_joker_enabled_turns))}"
-    )
+    print(f"Total winnings: {hands.total_winnings()}")
+    print(f"Total winnings: {hands.with_jokers(True).total_winnings()}")
 
 
 if __name__ == "__main__":
@@ -1,10 +1,14 @@
-from dataclasses import dataclass
+from argparse import ArgumentParser
+from array import array
+from dataclasses import dataclass, field
 from enum import Enum
-from itertools import cycle
-from math import lcm
-from pathlib import Path
-from typing import Dict
+from functools import reduce
+from itertools import count
+from math import gcd
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
+from utils.input_reader import parse_args, read_sections
+from utils.instrumentation import hot, profiled, timed
 from utils.interfaces import IParsable
 
 START_NODE = "AAA"
@@ -15,6 +19,17 @@ class Instruction(Enum):
     RIGHT = "R"
     LEFT = "L"
 
+    @property
+    def code(self) -> int:
+        """
+        :return: the index of this instruction's successor array in a CompiledMap
+        """
+        return 0 if self == Instruction.LEFT else 1
+
+
+def encode_instructions(instructions: List[Instruction]) -> bytes:
+    return bytes(instruction.code for instruction in instructions)
+
 
 @dataclass(frozen=True)
 class Node(IParsable):
@@ -51,38 +66,454 @@ class Map(IParsable):
         return Map({node.name: node for node in nodes})
 
 
-def main() -> None:
-    input_lines = Path("input/input.txt").read_text("utf-8")
-    raw_instructions, raw_map = input_lines.split("\n\n")
-    instructions = cycle([Instruction(i) for i in raw_instructions])
-    node_map = Map.parse(raw_map)
+@dataclass(frozen=True)
+class CompiledMap:
+    """
+    A Map with its nodes numbered in parse order, so walking it is array indexing rather than
+    string lookups. successors[code][i] is the index of the node reached from node i by the
+    instruction with that code, see Instruction.code.
+    """
+
+    names: List[str]
+    name_to_index: Dict[str, int]
+    successors: Tuple["array[int]", "array[int]"]
+
+    @classmethod
+    def compile(cls, node_map: Map) -> "CompiledMap":
+        names = list(node_map.value_to_node.keys())
+        name_to_index = {name: i for i, name in enumerate(names)}
+        return CompiledMap(
+            names=names,
+            name_to_index=name_to_index,
+            successors=(
+                array("l", (name_to_index[node_map.get(n).left] for n in names)),
+                array("l", (name_to_index[node_map.get(n).right] for n in names)),
+            ),
+        )
+
+    def index(self, node_name: str) -> int:
+        assert node_name in self.name_to_index, f"No node found with name {node_name}"
+        return self.name_to_index[node_name]
+
+    def mark(self, predicate: Callable[[str], bool]) -> bytes:
+        """
+        :return: for each node index, 1 if predicate holds for the node's name, otherwise 0
+        """
+        return bytes(predicate(name) for name in self.names)
+
+
+@dataclass(frozen=True)
+class PassTable:
+    """
+    Where one full pass of the instructions leads from each node, and the first step within that
+    pass which is on an end node. Passes are only walked from the nodes they are asked about, and
+    each is remembered, so a query costs time proportional to the passes it actually follows
+    rather than to the size of the whole map.
+    """
+
+    compiled_map: CompiledMap
+    instruction_codes: bytes
+    is_end: bytes
+    jumps: Dict[int, int] = field(default_factory=dict)
+    first_hits: Dict[int, int] = field(default_factory=dict)
+
+    @hot
+    def _walk_pass(self, start: int) -> None:
+        node = start
+        first_hit = -1
+        for step, code in enumerate(self.instruction_codes):
+            if first_hit == -1 and self.is_end[node]:
+                first_hit = step
+            node = self.compiled_map.successors[code][node]
+
+        self.jumps[start] = node
+        self.first_hits[start] = first_hit
+
+    def jump(self, node: int) -> int:
+        """
+        :return: the node reached from node after one full pass of the instructions
+        """
+        if node not in self.jumps:
+            self._walk_pass(node)
+        return self.jumps[node]
+
+    def first_hit(self, node: int) -> int:
+        """
+        :return: the first step within one pass of the instructions started from node that is on
+        an end node (counting the start as step 0), or -1
+        """
+        if node not in self.first_hits:
+            self._walk_pass(node)
+        return self.first_hits[node]
+
+    def jump_array(self) -> "array[int]":
+        """
+        :return: for each node index, the node reached after one full pass of the instructions
+        """
+        return array(
+            "l", (self.jump(node) for node in range(len(self.compiled_map.names)))
+        )
+
 
-    current_node = START_NODE
+def steps_to_reach(pass_table: PassTable, start: int) -> Optional[int]:
+    """
+    Follows the instructions a full pass at a time, only looking inside the pass on which an end
+    node is first reached.
+    :return: the number of steps from start to the first end node, or None if none is reachable
+    """
+    visited_pass_starts = set()
+    node = start
     steps = 0
-    while current_node != END_NODE:
-        instruction = next(instructions)
-        current_node = node_map.get(current_node).get(instruction)
-        steps += 1
+    while pass_table.first_hit(node) == -1:
+        if node in visited_pass_starts:
+            return None
+        visited_pass_starts.add(node)
+        node = pass_table.jump(node)
+        steps += len(pass_table.instruction_codes)
 
+    return steps + pass_table.first_hit(node)
+
+
+@dataclass(frozen=True)
+class DoublingTable:
+    """
+    Binary lifting tables answering "where is a walker after k steps" in O(log k) lookups.
+    Positions are (node, instruction offset) states, packed as node * len(instruction_codes) +
+    offset. state_levels[j][state] is the state 2 ** j steps on, for steps shorter than one pass
+    of the instructions, and pass_levels[j][node] is the node 2 ** j full passes on from a pass
+    start. state_levels holds about log2(len(instruction_codes)) arrays over every state, and
+    pass_levels grows on demand, so memory is proportional to the number of states times
+    log2(len(instruction_codes)), plus log k times the number of nodes.
+    """
+
+    num_instructions: int
+    state_levels: List["array[int]"]
+    pass_levels: List["array[int]"]
+
+    @classmethod
+    def build(cls, pass_table: PassTable) -> "DoublingTable":
+        """
+        :param pass_table: the jumps of which are reused as the first pass level
+        """
+        compiled_map = pass_table.compiled_map
+        instruction_codes = pass_table.instruction_codes
+        num_instructions = len(instruction_codes)
+        next_state = array(
+            "l",
+            (
+                compiled_map.successors[code][node] * num_instructions
+                + (offset + 1) % num_instructions
+                for node in range(len(compiled_map.names))
+                for offset, code in enumerate(instruction_codes)
+            ),
+        )
+        state_levels = [next_state]
+        while len(state_levels) < (num_instructions - 1).bit_length():
+            previous = state_levels[-1]
+            state_levels.append(array("l", (previous[s] for s in previous)))
+
+        return DoublingTable(
+            num_instructions=num_instructions,
+            state_levels=state_levels,
+            pass_levels=[pass_table.jump_array()],
+        )
+
+    def _advance_within_pass(self, state: int, steps: int) -> int:
+        level = 0
+        while steps:
+            if steps & 1:
+                state = self.state_levels[level][state]
+            steps >>= 1
+            level += 1
+
+        return state
+
+    def _advance_passes(self, node: int, passes: int) -> int:
+        while (1 << len(self.pass_levels)) <= passes:
+            previous = self.pass_levels[-1]
+            self.pass_levels.append(array("l", (previous[n] for n in previous)))
+
+        level = 0
+        while passes:
+            if passes & 1:
+                node = self.pass_levels[level][node]
+            passes >>= 1
+            level += 1
+
+        return node
+
+    def position_after(self, node: int, steps: int, offset: int = 0) -> Tuple[int, int]:
+        """
+        :param node: the index of the node the walker is on
+        :param steps: how many steps to take
+        :param offset: the index of the next instruction the walker will follow
+        :return: the (node index, next instruction offset) of the walker after steps steps
+        """
+        state = node * self.num_instructions + offset
+
+        # Finish the current pass, then skip whole passes, then take the remaining steps
+        to_pass_end = (self.num_instructions - offset) % self.num_instructions
+        if steps < to_pass_end:
+            return divmod(
+                self._advance_within_pass(state, steps), self.num_instructions
+            )
+
+        node = self._advance_within_pass(state, to_pass_end) // self.num_instructions
+        passes, remaining_steps = divmod(steps - to_pass_end, self.num_instructions)
+        node = self._advance_passes(node, passes)
+        return divmod(
+            self._advance_within_pass(node * self.num_instructions, remaining_steps),
+            self.num_instructions,
+        )
+
+    def all_at_end(self, nodes: List[int], steps: int, is_end: bytes) -> bool:
+        """
+        :return: whether walkers starting on each of nodes are all on end nodes after steps steps
+        """
+        return all(is_end[self.position_after(node, steps)[0]] for node in nodes)
+
+
+@dataclass(frozen=True)
+class GhostCycle:
+    """
+    The path of a single ghost, which is eventually periodic in its (node, instruction index)
+    state. Steps 0 to tail_length - 1 happen once, after which the ghost repeats a cycle of
+    cycle_length steps forever. tail_hits are the steps within the tail that end on an end node,
+    and cycle_hits are the steps within the first pass of the cycle that do.
+    """
+
+    tail_length: int
+    cycle_length: int
+    tail_hits: List[int]
+    cycle_hits: List[int]
+
+    @classmethod
+    def find(
+        cls,
+        compiled_map: CompiledMap,
+        instruction_codes: bytes,
+        start: int,
+        is_end: bytes,
+    ) -> "GhostCycle":
+        # States are packed as node * len(instruction_codes) + instruction index
+        state_to_step: Dict[int, int] = {}
+        hits = []
+        node = start
+        step = 0
+        offset = 0
+        while node * len(instruction_codes) + offset not in state_to_step:
+            state_to_step[node * len(instruction_codes) + offset] = step
+            if is_end[node]:
+                hits.append(step)
+            node = compiled_map.successors[instruction_codes[offset]][node]
+            step += 1
+            offset = step % len(instruction_codes)
+
+        tail_length = state_to_step[node * len(instruction_codes) + offset]
+        return GhostCycle(
+            tail_length=tail_length,
+            cycle_length=step - tail_length,
+            tail_hits=[hit for hit in hits if hit < tail_length],
+            cycle_hits=[hit for hit in hits if hit >= tail_length],
+        )
+
+    def is_hit(self, step: int) -> bool:
+        if step < self.tail_length:
+            return step in self.tail_hits
+
+        offset = (step - self.tail_length) % self.cycle_length
+        return self.tail_length + offset in self.cycle_hits
+
+    def hits_from(self, start: int) -> Iterator[int]:
+        """
+        :return: the steps from start onwards that end on an end node, in ascending order
+        """
+        yield from (hit for hit in self.tail_hits if hit >= start)
+        if not self.cycle_hits:
+            return
+
+        cycles_before = max(0, start - self.tail_length) // self.cycle_length
+        for cycle_start in count(
+            self.tail_length + cycles_before * self.cycle_length, self.cycle_length
+        ):
+            yield from (
+                cycle_start + hit - self.tail_length
+                for hit in self.cycle_hits
+                if cycle_start + hit - self.tail_length >= start
+            )
+
+    def hits_before(self, end: int) -> List[int]:
+        hits = [hit for hit in self.tail_hits if hit < end]
+        for cycle_start in range(self.tail_length, end, self.cycle_length):
+            hits.extend(
+                cycle_start + hit - self.tail_length
+                for hit in self.cycle_hits
+                if cycle_start + hit - self.tail_length < end
+            )
+
+        return hits
+
+
+def combine_congruences(
+    a: Tuple[int, int], b: Tuple[int, int]
+) -> Optional[Tuple[int, int]]:
+    """
+    Generalized Chinese remainder theorem for moduli that need not be coprime.
+    :param a: (residue, modulus) for the congruence x = residue (mod modulus)
+    :param b: (residue, modulus) for a second congruence
+    :return: the (residue, modulus) of the x satisfying both congruences, or None if there is none
+    """
+    residue_a, modulus_a = a
+    residue_b, modulus_b = b
+    divisor = gcd(modulus_a, modulus_b)
+    if (residue_b - residue_a) % divisor != 0:
+        return None
+
+    reduced_modulus_b = modulus_b // divisor
+    k = (
+        (residue_b - residue_a)
+        // divisor
+        * pow(modulus_a // divisor, -1, reduced_modulus_b)
+    ) % reduced_modulus_b
+    modulus = modulus_a * reduced_modulus_b
+    return (residue_a + modulus_a * k) % modulus, modulus
+
+
+def _search_common_hit(
+    ghost_cycles: List[GhostCycle], start: int, end: int
+) -> Optional[int]:
+    """
+    Steps through the hits of the ghost that is on an end node least often, checking whether
+    every other ghost is on an end node too.
+    :return: the first step in [start, end) at which every ghost is on an end node, or None
+    """
+    sparsest = min(
+        ghost_cycles,
+        key=lambda ghost_cycle: len(ghost_cycle.cycle_hits) / ghost_cycle.cycle_length,
+    )
+    for step in sparsest.hits_from(start):
+        if step >= end:
+            return None
+        if all(ghost_cycle.is_hit(step) for ghost_cycle in ghost_cycles):
+            return step
+
+    return None
+
+
+def first_common_hit(ghost_cycles: List[GhostCycle]) -> Optional[int]:
+    """
+    :return: the first step at which every ghost is on an end node at the same time, or None if
+    that never happens. With no ghosts at all, that is step 0. Each combination of one cycle hit
+    per ghost gives a congruence, so the work grows with the product of the ghosts' numbers of
+    cycle hits. Once that product outgrows a direct search over one period of all the cycles
+    together, the direct search is used.
+    """
+    if not ghost_cycles:
+        return 0
+
+    # Before every ghost has entered its cycle, check the hits of the first ghost directly
+    all_periodic_from = max(ghost_cycle.tail_length for ghost_cycle in ghost_cycles)
+    for step in sorted(ghost_cycles[0].hits_before(all_periodic_from)):
+        if all(ghost_cycle.is_hit(step) for ghost_cycle in ghost_cycles):
+            return step
+
+    # From then on, whether every ghost is on an end node repeats with this period
+    period = reduce(
+        lambda a, b: a * b // gcd(a, b),
+        (ghost_cycle.cycle_length for ghost_cycle in ghost_cycles),
+    )
+    search_steps = min(
+        period // ghost_cycle.cycle_length * len(ghost_cycle.cycle_hits)
+        for ghost_cycle in ghost_cycles
+    )
+
+    # Each ghost is on an end node exactly when the step is congruent to one of its cycle hits
+    # modulo its cycle length. Every combination so far shares one modulus, so distinct residues
+    # are distinct solutions.
+    residues = {0}
+    modulus = 1
+    for ghost_cycle in sorted(
+        ghost_cycles, key=lambda ghost_cycle: len(ghost_cycle.cycle_hits)
+    ):
+        if len(residues) * len(ghost_cycle.cycle_hits) > search_steps:
+            return _search_common_hit(
+                ghost_cycles, all_periodic_from, all_periodic_from + period
+            )
+
+        combined = [
+            combine_congruences(
+                (residue, modulus),
+                (hit % ghost_cycle.cycle_length, ghost_cycle.cycle_length),
+            )
+            for residue in residues
+            for hit in ghost_cycle.cycle_hits
+        ]
+        residues = {congruence[0] for congruence in combined if congruence is not None}
+        modulus = (
+            modulus * ghost_cycle.cycle_length // gcd(modulus, ghost_cycle.cycle_length)
+        )
+
+    return min(
+        (
+            residue + max(0, -(-(all_periodic_from - residue) // modulus)) * modulus
+            for residue in residues
+        ),
+        default=None,
+    )
+
+
+def add_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--position-after",
+        type=int,
+        metavar="STEPS",
+        help=f"also report the node a walker starting on {START_NODE} is on after STEPS steps",
+    )
+
+
+@profiled
+def main() -> None:
+    args = parse_args(__file__, add_arguments=add_arguments)
+    raw_instructions, raw_map = read_sections(args.input)
+    instruction_codes = encode_instructions([Instruction(i) for i in raw_instructions])
+    compiled_map = CompiledMap.compile(Map.parse(raw_map))
+
+    pass_table = PassTable(
+        compiled_map,
+        instruction_codes,
+        compiled_map.mark(lambda node: node == END_NODE),
+    )
+    steps = steps_to_reach(pass_table, compiled_map.index(START_NODE))
     print(f"It took {steps} steps to get to {END_NODE}")
 
-    starting_nodes = [
-        node for node in node_map.value_to_node.keys() if node.endswith("A")
+    is_ghost_end = compiled_map.mark(lambda node: node.endswith("Z"))
+    ghost_starts = [
+        compiled_map.index(node) for node in compiled_map.names if node.endswith("A")
     ]
-    cycle_lengths = {}
-    for node in starting_nodes:
-        next_node = node
-        instructions = cycle([Instruction(i) for i in raw_instructions])
-        for step, instruction in enumerate(instructions):
-            if next_node.endswith("Z"):
-                cycle_lengths[node] = step
-                break
-            next_node = node_map.get(next_node).get(instruction)
-
-    print(
-        f"It took {lcm(*cycle_lengths.values())} before I was only on nodes that end"
-        " in Z"
-    )
+    ghost_cycles = []
+    for start in ghost_starts:
+        with timed("GhostCycle.find"):
+            ghost_cycles.append(
+                GhostCycle.find(compiled_map, instruction_codes, start, is_ghost_end)
+            )
+
+    ghost_steps = first_common_hit(ghost_cycles)
+    if ghost_starts:
+        print(f"It took {ghost_steps} before I was only on nodes that end in Z")
+    else:
+        print("There were no nodes ending in A, so there were no ghosts to follow")
+
+    # The doubling table covers every (node, offset) state, so only build it when it is needed
+    if args.position_after is not None:
+        with timed("DoublingTable.build"):
+            doubling_table = DoublingTable.build(pass_table)
+        node, offset = doubling_table.position_after(
+            compiled_map.index(START_NODE), args.position_after
+        )
+        print(
+            f"After {args.position_after} steps from {START_NODE}, I was on"
+            f" {compiled_map.names[node]} about to follow instruction {offset}"
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+import random
+from argparse import ArgumentParser
+from typing import List
+
+from day9 import main as day9
+from utils.benchmark import time_batch
+
+
+def generate_sequences(
+    num_sequences: int, length: int, rng: random.Random
+) -> List[day9.Sequence]:
+    sequences = []
+    for _ in range(num_sequences):
+        coefficients = [rng.randint(-20, 20) for _ in range(rng.randint(1, 6))]
+        sequences.append(
+            day9.Sequence(
+                [
+                    sum(c * x**power for power, c in enumerate(coefficients))
+                    for x in range(length)
+                ]
+            )
+        )
+
+    return sequences
+
+
+def sum_per_sequence(sequences: List[day9.Sequence]) -> List[int]:
+    return [
+        sum(s.extrapolate(day9.Direction.Forward) for s in sequences),
+        sum(s.extrapolate(day9.Direction.Backward) for s in sequences),
+    ]
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Compare per-sequence and batched day9 sums")
+    parser.add_argument("--sequences", type=int, default=10**5)
+    parser.add_argument("--length", type=int, default=21)
+    parser.add_argument("--random-seed", type=int, default=2023)
+    args = parser.parse_args()
+
+    rng = random.Random(args.random_seed)
+    sequences = generate_sequences(args.sequences, args.length, rng)
+    ragged_sequences = [
+        day9.Sequence(s.sequence[: rng.randint(1, args.length)]) for s in sequences
+    ]
+
+    for label, inputs in (("equal length", sequences), ("ragged", ragged_sequences)):
+        assert list(day9.extrapolated_sums(inputs)) == sum_per_sequence(inputs)
+        time_batch(f"{label} per-sequence", inputs, sum_per_sequence)
+        time_batch(f"{label} batched", inputs, day9.extrapolated_sums)
+
+
+if __name__ == "__main__":
+    main()
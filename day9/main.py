@@ -1,8 +1,12 @@
 from dataclasses import dataclass
 from enum import Enum
-from pathlib import Path
-from typing import List
+from functools import lru_cache
+from math import comb
+from operator import add
+from typing import Dict, Iterable, List, Tuple
 
+from utils.input_reader import parse_args, read_lines
+from utils.instrumentation import profiled
 from utils.interfaces import IParsable
 
 
@@ -11,6 +15,20 @@ class Direction(Enum):
     Backward = (0, -1)
 
 
+@lru_cache(maxsize=None)
+def extrapolation_coefficients(length: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """
+    Extrapolating by repeated differences is the same as extrapolating the polynomial of degree
+    length - 1 through the sequence, which has the closed form
+        next     = sum_i (-1) ** (length - 1 - i) * C(length, i) * sequence[i]
+        previous = sum_i (-1) ** i * C(length, i + 1) * sequence[i]
+    :return: the forward and backward coefficients for sequences of the given length
+    """
+    forward = tuple((-1) ** (length - 1 - i) * comb(length, i) for i in range(length))
+    backward = tuple((-1) ** i * comb(length, i + 1) for i in range(length))
+    return forward, backward
+
+
 @dataclass(frozen=True)
 class Sequence(IParsable):
     sequence: List[int]
@@ -19,29 +37,66 @@ class Sequence(IParsable):
     def parse(cls, string: str) -> "Sequence":
         return Sequence([int(v) for v in string.split()])
 
+    def extrapolate_both(self) -> Tuple[int, int]:
+        """
+        :return: the forward and backward extrapolated values, from one pass over the sequence
+        """
+        forward_coefficients, backward_coefficients = extrapolation_coefficients(
+            len(self.sequence)
+        )
+        forward = 0
+        backward = 0
+        for value, forward_coefficient, backward_coefficient in zip(
+            self.sequence, forward_coefficients, backward_coefficients
+        ):
+            forward += forward_coefficient * value
+            backward += backward_coefficient * value
+
+        return forward, backward
+
     def extrapolate(self, direction: Direction) -> int:
-        if all(n == 0 for n in self.sequence):
-            return 0
+        forward, backward = self.extrapolate_both()
+        return forward if direction == Direction.Forward else backward
 
-        start_idx, multiplier = direction.value
 
-        return self.sequence[start_idx] + multiplier * Sequence([
-            a - b for a, b in zip(self.sequence[1:], self.sequence[:-1])
-        ]).extrapolate(direction)
+def extrapolated_sums(sequences: Iterable[Sequence]) -> Tuple[int, int]:
+    """
+    Sums the forward and backward extrapolated values of many sequences at once. Extrapolation is
+    linear, so the sum over sequences of the same length is the coefficient row dotted with the
+    column sums of those sequences. Only one row of column sums per distinct length is held, and
+    ragged inputs just end up with one row per length.
+    :return: the sum of the forward and the sum of the backward extrapolated values
+    """
+    length_to_column_sums: Dict[int, List[int]] = {}
+    for sequence in sequences:
+        length = len(sequence.sequence)
+        if length in length_to_column_sums:
+            length_to_column_sums[length] = list(
+                map(add, length_to_column_sums[length], sequence.sequence)
+            )
+        else:
+            length_to_column_sums[length] = list(sequence.sequence)
 
+    forward_sum = 0
+    backward_sum = 0
+    for column_sums in length_to_column_sums.values():
+        forward, backward = Sequence(column_sums).extrapolate_both()
+        forward_sum += forward
+        backward_sum += backward
 
+    return forward_sum, backward_sum
+
+
+@profiled
 def main() -> None:
-    input_lines = Path("input/input.txt").read_text("utf-8").split("\n")
-    sequences = [Sequence.parse(line) for line in input_lines]
-    print(
-        "Extrapolating forwards, the sum of extrapolated values is"
-        f" {sum(sequence.extrapolate(Direction.Forward) for sequence in sequences)}"
-    )
-    print(
-        "Extrapolating backwards, the sum of extrapolated values is"
-        f" {sum(sequence.extrapolate(Direction.Backward) for sequence in sequences)}"
+    args = parse_args(__file__)
+    forward_sum, backward_sum = extrapolated_sums(
+        Sequence.parse(line) for line in read_lines(args.input)
     )
 
+    print(f"Extrapolating forwards, the sum of extrapolated values is {forward_sum}")
+    print(f"Extrapolating backwards, the sum of extrapolated values is {backward_sum}")
+
 
 if __name__ == "__main__":
     main()
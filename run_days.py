@@ -0,0 +1,172 @@
+import importlib
+import io
+import os
+import resource
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from dataclasses import dataclass, replace
+from pathlib import Path
+from time import perf_counter, process_time
+from typing import Any, Dict, List
+
+PROJECT_ROOT = Path(__file__).parent.resolve()
+# ru_maxrss is in bytes on macOS and in kilobytes on Linux
+MAX_RSS_UNIT_BYTES = 1 if sys.platform == "darwin" else 1024
+
+
+@dataclass(frozen=True)
+class Checkpoint:
+    """
+    Resource usage at the moment a day printed a line of output. Days print one line per part
+    (or a label and then a value), so the differences between consecutive checkpoints give the
+    cost of each part. peak_rss_bytes is the peak for the whole process up to that moment, not
+    for the part alone.
+    """
+
+    line: str
+    wall_time: float
+    cpu_time: float
+    peak_rss_bytes: int
+
+
+@dataclass(frozen=True)
+class DayResult:
+    day: str
+    checkpoints: List[Checkpoint]
+    error: str = ""
+
+
+class CheckpointingWriter(io.StringIO):
+    def __init__(self, wall_start: float, cpu_start: float) -> None:
+        super().__init__()
+        self.wall_start = wall_start
+        self.cpu_start = cpu_start
+        self.checkpoints: List[Checkpoint] = []
+        self._partial_line = ""
+
+    def write(self, text: str) -> int:
+        *lines, self._partial_line = (self._partial_line + text).split("\n")
+        for line in lines:
+            self.checkpoints.append(
+                Checkpoint(
+                    line=line,
+                    wall_time=perf_counter() - self.wall_start,
+                    cpu_time=process_time() - self.cpu_start,
+                    peak_rss_bytes=resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                    * MAX_RSS_UNIT_BYTES,
+                )
+            )
+        return len(text)
+
+
+def discover_days() -> List[str]:
+    days = [
+        path.parent.name
+        for path in PROJECT_ROOT.glob("day*/main.py")
+        if path.parent.name[len("day") :].isdigit()
+    ]
+    return sorted(days, key=lambda day: int(day[len("day") :]))
+
+
+def run_day(day: str) -> DayResult:
+    module = importlib.import_module(f"{day}.main")
+    writer = CheckpointingWriter(perf_counter(), process_time())
+    # Each day's main parses its own arguments, so hide the runner's from it
+    original_argv = sys.argv
+    sys.argv = [module.__file__ or day]
+    try:
+        with redirect_stdout(writer):
+            module.main()
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        return DayResult(day, writer.checkpoints, error=repr(e))
+    finally:
+        sys.argv = original_argv
+
+    return DayResult(day, writer.checkpoints)
+
+
+def group_parts(checkpoints: List[Checkpoint]) -> List[Checkpoint]:
+    """
+    :return: one checkpoint per part, where a label line ending in ":" is joined with the value
+    line after it, taking the value line's resource usage
+    """
+    parts: List[Checkpoint] = []
+    label = ""
+    for checkpoint in checkpoints:
+        if checkpoint.line.endswith(":"):
+            label += checkpoint.line + " "
+            continue
+        parts.append(replace(checkpoint, line=label + checkpoint.line))
+        label = ""
+    # A day that failed after printing a label never printed its value
+    if label:
+        parts.append(replace(checkpoints[-1], line=label.rstrip()))
+
+    return parts
+
+
+def print_report(results: List[DayResult]) -> None:
+    print(
+        f"{'day':<6} {'part':<4} {'wall s':>9} {'cpu s':>9} {'cum. peak rss MB':>16}"
+        "  output"
+    )
+    for result in results:
+        wall_time = cpu_time = 0.0
+        for part, checkpoint in enumerate(group_parts(result.checkpoints), start=1):
+            print(
+                f"{result.day:<6} {part:<4}"
+                f" {checkpoint.wall_time - wall_time:>9.3f}"
+                f" {checkpoint.cpu_time - cpu_time:>9.3f}"
+                f" {checkpoint.peak_rss_bytes / 2**20:>16.1f}  {checkpoint.line}"
+            )
+            wall_time, cpu_time = checkpoint.wall_time, checkpoint.cpu_time
+
+        if result.error:
+            print(
+                f"{result.day:<6} {'':<4} {'':>9} {'':>9} {'':>16}  ERROR {result.error}"
+            )
+        if result.checkpoints:
+            last = result.checkpoints[-1]
+            print(
+                f"{result.day:<6} {'all':<4} {last.wall_time:>9.3f} {last.cpu_time:>9.3f}"
+                f" {last.peak_rss_bytes / 2**20:>16.1f}"
+            )
+
+
+def main() -> None:
+    parser = ArgumentParser(
+        description="Run every day's solution in parallel and time it"
+    )
+    parser.add_argument(
+        "days",
+        nargs="*",
+        help="days to run, e.g. day1 day5 (default: every day found)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="number of worker processes (default: the number of CPUs)",
+    )
+    args = parser.parse_args()
+
+    days = args.days or discover_days()
+    pool_kwargs: Dict[str, Any] = {"max_workers": args.workers}
+    if sys.version_info >= (3, 11):
+        # A fresh process per day keeps each day's peak RSS separate
+        pool_kwargs["max_tasks_per_child"] = 1
+
+    wall_start = perf_counter()
+    with ProcessPoolExecutor(**pool_kwargs) as executor:
+        results = list(executor.map(run_day, days))
+
+    print_report(results)
+    print(f"Ran {len(days)} days in {perf_counter() - wall_start:.3f}s")
+    if any(result.error for result in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
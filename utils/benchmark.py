@@ -0,0 +1,43 @@
+import tracemalloc
+from time import perf_counter
+from typing import Callable, List
+
+from utils.utils import T
+
+
+def report(label: str, num_items: int, elapsed: float) -> None:
+    print(
+        f"{label:<32} {num_items:>9} items  {elapsed:8.3f}s "
+        f" {elapsed / num_items * 1e6:10.3f}us/item"
+    )
+
+
+def time_per_item(label: str, items: List[T], function: Callable[[T], object]) -> None:
+    start = perf_counter()
+    for item in items:
+        function(item)
+    report(label, len(items), perf_counter() - start)
+
+
+def time_batch(
+    label: str, items: List[T], function: Callable[[List[T]], object]
+) -> None:
+    start = perf_counter()
+    function(items)
+    report(label, len(items), perf_counter() - start)
+
+
+def measure(label: str, num_items: int, function: Callable[[], T]) -> T:
+    """
+    Times function and reports its peak traced memory per item. tracemalloc slows allocation
+    heavy code down, so only compare timings from measure with other timings from measure.
+    """
+    tracemalloc.start()
+    start = perf_counter()
+    result = function()
+    elapsed = perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    report(label, num_items, elapsed)
+    print(f"{'':<32} peak memory {peak / num_items:8.1f} bytes/item")
+    return result
@@ -0,0 +1,95 @@
+import sys
+from argparse import ArgumentParser, Namespace
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Union
+
+from utils.instrumentation import add_instrumentation_arguments
+
+STDIN = "-"
+DEFAULT_INPUT = Path("input") / "input.txt"
+
+Source = Union[str, Path]
+
+
+def default_input_path(main_file: str) -> Path:
+    """
+    :param main_file: the __file__ of a day's main module
+    :return: the path to that day's puzzle input, independent of the current working directory
+    """
+    return Path(main_file).resolve().parent / DEFAULT_INPUT
+
+
+def parse_args(
+    main_file: str,
+    argv: Optional[List[str]] = None,
+    add_arguments: Optional[Callable[[ArgumentParser], None]] = None,
+) -> Namespace:
+    """
+    :param add_arguments: adds any arguments specific to the day to the parser
+    """
+    parser = ArgumentParser(
+        description=f"Solve {Path(main_file).resolve().parent.name}"
+    )
+    parser.add_argument(
+        "input",
+        nargs="?",
+        default=str(default_input_path(main_file)),
+        help=f"path to the puzzle input, or {STDIN} to read from stdin",
+    )
+    parser.add_argument(
+        "--parse-cache",
+        action="store_true",
+        help="load the parsed input from the on-disk parse cache when it has been parsed before",
+    )
+    # Handled by the @profiled decorator around main, but listed here for --help
+    add_instrumentation_arguments(parser)
+    if add_arguments is not None:
+        add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def _iter_raw_lines(source: Source) -> Iterator[str]:
+    if str(source) == STDIN:
+        yield from sys.stdin
+        return
+
+    with open(source, "r", encoding="utf-8") as file:
+        yield from file
+
+
+def read_lines(source: Source) -> Iterator[str]:
+    """
+    Lazily yields the lines of the input without their line endings. Blank lines are yielded as
+    empty strings, except for any trailing blank lines at the end of the input, which are dropped.
+    Only a count of pending blank lines is held, so memory does not grow with the input size.
+    :param source: path to the input, or STDIN
+    """
+    pending_blank_lines = 0
+    for raw_line in _iter_raw_lines(source):
+        line = raw_line.rstrip("\r\n")
+        if line == "":
+            pending_blank_lines += 1
+            continue
+
+        yield from ("" for _ in range(pending_blank_lines))
+        pending_blank_lines = 0
+        yield line
+
+
+def read_sections(source: Source) -> Iterator[str]:
+    """
+    Lazily yields the blank-line-separated sections of the input, with the lines of each section
+    joined by "\n". Only one section is held in memory at a time.
+    :param source: path to the input, or STDIN
+    """
+    section: List[str] = []
+    for line in read_lines(source):
+        if line == "":
+            if section:
+                yield "\n".join(section)
+            section = []
+            continue
+        section.append(line)
+
+    if section:
+        yield "\n".join(section)
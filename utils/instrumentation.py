@@ -0,0 +1,226 @@
+import cProfile
+import importlib
+import io
+import pstats
+import sys
+import tracemalloc
+from argparse import ArgumentParser
+from contextlib import contextmanager, redirect_stdout
+from dataclasses import dataclass
+from functools import wraps
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO, Tuple
+
+from utils.utils import T
+
+# (module name, qualified name) of every function marked with @hot
+_HOT_FUNCTIONS: List[Tuple[str, str]] = []
+# (owner, attribute name, original attribute) for every hot function currently patched
+_PATCHED: List[Tuple[Any, str, Any]] = []
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    seconds: float = 0.0
+
+
+_STATS: Dict[str, CallStats] = {}
+# Whether hot stats are being collected, which timed blocks check as well as the patched functions
+_ENABLED = False
+
+
+def hot(function: T) -> T:
+    """
+    Marks a function or method as a hot path whose calls are counted and timed while hot stats
+    are enabled. The function itself is returned untouched, so when hot stats are disabled there
+    is no overhead at all: enable_hot_stats swaps timing wrappers in at runtime instead. Apply it
+    outermost, above @classmethod or @singledispatchmethod.
+    """
+    # classmethods keep the function in __func__ and singledispatchmethods in func
+    underlying: Any = getattr(function, "__func__", getattr(function, "func", function))
+    _HOT_FUNCTIONS.append((underlying.__module__, underlying.__qualname__))
+    return function
+
+
+def _record(name: str, seconds: float) -> None:
+    stats = _STATS.setdefault(name, CallStats())
+    stats.calls += 1
+    stats.seconds += seconds
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Counts and times a block under name while hot stats are enabled, and does nothing otherwise.
+    """
+    if not _ENABLED:
+        yield
+        return
+
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, perf_counter() - start)
+
+
+def _timing_wrapper(name: str, owner: Any, original: Any) -> Any:
+    if isinstance(owner, type) and isinstance(original, classmethod):
+        bound = original.__func__
+
+        def timed_classmethod(cls: Any, *args: Any, **kwargs: Any) -> Any:
+            start = perf_counter()
+            try:
+                return bound(cls, *args, **kwargs)
+            finally:
+                _record(name, perf_counter() - start)
+
+        return classmethod(timed_classmethod)
+
+    if isinstance(owner, type):
+        # Works for plain methods as well as descriptors such as singledispatchmethod
+        def timed_method(self: Any, *args: Any, **kwargs: Any) -> Any:
+            start = perf_counter()
+            try:
+                # pylint: disable-next=unnecessary-dunder-call
+                return original.__get__(self, type(self))(*args, **kwargs)
+            finally:
+                _record(name, perf_counter() - start)
+
+        return timed_method
+
+    @wraps(original)
+    def timed_function(*args: Any, **kwargs: Any) -> Any:
+        start = perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            _record(name, perf_counter() - start)
+
+    return timed_function
+
+
+def enable_hot_stats() -> None:
+    global _ENABLED  # pylint: disable=global-statement
+    _ENABLED = True
+    for module_name, qualname in _HOT_FUNCTIONS:
+        owner: Any = importlib.import_module(module_name)
+        *owner_path, attribute = qualname.split(".")
+        for part in owner_path:
+            owner = getattr(owner, part)
+        original = vars(owner)[attribute]
+        _PATCHED.append((owner, attribute, original))
+        setattr(owner, attribute, _timing_wrapper(qualname, owner, original))
+
+
+def disable_hot_stats() -> None:
+    global _ENABLED  # pylint: disable=global-statement
+    _ENABLED = False
+    while _PATCHED:
+        owner, attribute, original = _PATCHED.pop()
+        setattr(owner, attribute, original)
+
+
+def report_hot_stats(stream: TextIO) -> None:
+    print(
+        f"{'hot function':<56} {'calls':>12} {'total s':>10} {'us/call':>10}",
+        file=stream,
+    )
+    for name, stats in sorted(_STATS.items(), key=lambda item: -item[1].seconds):
+        print(
+            f"{name:<56} {stats.calls:>12} {stats.seconds:>10.3f}"
+            f" {stats.seconds / stats.calls * 1e6:>10.3f}",
+            file=stream,
+        )
+
+
+class _SnapshotOnOutput(io.TextIOBase):
+    """
+    Forwards output to stream, taking a tracemalloc snapshot whenever a line is written while more
+    memory is traced than at any earlier line. Days print each answer while the data it was
+    computed from is still alive, so this catches the allocations behind the peak, which a
+    snapshot taken after main returns would miss.
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        super().__init__()
+        self.stream = stream
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self._snapshot_size = -1
+
+    def write(self, text: str) -> int:
+        if "\n" in text and tracemalloc.is_tracing():
+            size, _ = tracemalloc.get_traced_memory()
+            if size > self._snapshot_size:
+                self.snapshot = tracemalloc.take_snapshot()
+                self._snapshot_size = size
+        return self.stream.write(text)
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+
+def add_instrumentation_arguments(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="run under cProfile and count calls to hot functions, reporting to stderr",
+    )
+    parser.add_argument(
+        "--profile-output", help="also dump the raw cProfile stats to this file"
+    )
+    parser.add_argument(
+        "--trace-alloc",
+        action="store_true",
+        help="trace allocations with tracemalloc and report the top lines to stderr",
+    )
+    parser.add_argument("--top", type=int, default=20, help="number of lines to report")
+
+
+def profiled(main: Callable[[], None]) -> Callable[[], None]:
+    """
+    Gives a day's main the --profile and --trace-alloc switches. Without them, main runs as is.
+    """
+
+    @wraps(main)
+    def wrapper() -> None:
+        parser = ArgumentParser(add_help=False)
+        add_instrumentation_arguments(parser)
+        args, _ = parser.parse_known_args()
+        if not args.profile and not args.trace_alloc:
+            main()
+            return
+
+        profile = cProfile.Profile()
+        output = _SnapshotOnOutput(sys.stdout)
+        if args.trace_alloc:
+            tracemalloc.start()
+        if args.profile:
+            enable_hot_stats()
+            profile.enable()
+        try:
+            with redirect_stdout(output):
+                main()
+        finally:
+            if args.profile:
+                profile.disable()
+                disable_hot_stats()
+                stats = pstats.Stats(profile, stream=sys.stderr)
+                stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(args.top)
+                if args.profile_output:
+                    stats.dump_stats(args.profile_output)
+                report_hot_stats(sys.stderr)
+            if args.trace_alloc:
+                snapshot = output.snapshot or tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"Peak traced memory: {peak / 2**20:.1f} MiB", file=sys.stderr)
+                print(
+                    f"Top {args.top} allocating lines at the largest output checkpoint:",
+                    file=sys.stderr,
+                )
+                for statistic in snapshot.statistics("lineno")[: args.top]:
+                    print(statistic, file=sys.stderr)
+
+    return wrapper
@@ -0,0 +1,103 @@
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional, Type, TypeVar
+
+from utils.input_reader import STDIN, Source, read_lines
+from utils.interfaces import IParsable
+from utils.utils import T, find_between
+
+P = TypeVar("P", bound=Type[IParsable])
+
+CACHE_DIRECTORY = Path(__file__).resolve().parent.parent / ".parse_cache"
+PICKLE_PROTOCOL = 5
+# Bump this when cached results change in a way the parser sources folded into the key do not show
+CACHE_FORMAT_VERSION = 1
+
+
+def memoized_parse(maxsize: Optional[int] = 4096) -> Callable[[P], P]:
+    """
+    Class decorator putting an in-process LRU cache in front of an IParsable's parse, so parsing
+    a string that has been parsed before returns the same instance. Only use it on immutable
+    classes, as every caller parsing an identical string shares that instance.
+    :param maxsize: the number of distinct strings to remember, or None for no limit
+    """
+
+    def decorator(cls: P) -> P:
+        parse = lru_cache(maxsize=maxsize)(cls.parse)
+        setattr(cls, "parse", staticmethod(parse))
+        return cls
+
+    return decorator
+
+
+def _module_source(function: Callable[..., Any]) -> bytes:
+    source_file = inspect.getsourcefile(function)
+    return Path(source_file).read_bytes() if source_file else b""
+
+
+def _parser_fingerprint(parse: Callable[[Source], T]) -> bytes:
+    # Parsing code that changes invalidates the cache, so fold in the source of the parser's module
+    # and of the helpers parsers build on: reading lines, find_between and memoized_parse
+    return b"\0".join(
+        [
+            f"{CACHE_FORMAT_VERSION}:{parse.__module__}.{parse.__qualname__}".encode(),
+            *(
+                _module_source(function)
+                for function in (parse, read_lines, find_between, memoized_parse)
+            ),
+        ]
+    )
+
+
+def cache_path(
+    source: Source,
+    parse: Callable[[Source], T],
+    cache_directory: Path = CACHE_DIRECTORY,
+) -> Path:
+    """
+    :return: where the result of parse(source) is cached, keyed by the SHA-256 of the input's
+    content and of the parser
+    """
+    digest = hashlib.sha256(_parser_fingerprint(parse))
+    with open(source, "rb") as file:
+        while chunk := file.read(1 << 20):
+            digest.update(chunk)
+
+    return cache_directory / f"{parse.__qualname__}-{digest.hexdigest()}.pickle"
+
+
+def load_or_parse(
+    source: Source,
+    parse: Callable[[Source], T],
+    cache_directory: Path = CACHE_DIRECTORY,
+) -> T:
+    """
+    Returns parse(source), loading it from the on-disk parse cache if this parser has already
+    parsed an input with the same content, and otherwise parsing it and saving the result there.
+    Input read from stdin is never cached.
+    :param parse: a module-level function parsing the whole input, whose result can be pickled
+    """
+    if str(source) == STDIN:
+        return parse(source)
+
+    path = cache_path(source, parse, cache_directory)
+    try:
+        with open(path, "rb") as file:
+            parsed: T = pickle.load(file)
+            return parsed
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        pass
+
+    parsed = parse(source)
+    cache_directory.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file first, so that concurrent runs never read a partial pickle
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=cache_directory)
+    with os.fdopen(file_descriptor, "wb") as file:
+        pickle.dump(parsed, file, protocol=PICKLE_PROTOCOL)
+    os.replace(temporary_path, path)
+    return parsed
@@ -1,4 +1,5 @@
-from typing import Callable, List, Optional, TypeVar
+from itertools import chain
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, TypeVar
 
 T = TypeVar("T")
 X = TypeVar("X")
@@ -8,19 +9,51 @@ def flatten(list_of_lists: List[List[T]]) -> List[T]:
     return [item for sublist in list_of_lists for item in sublist]
 
 
-def try_parse_value_between_strings(
-    string: str, before: str, after: str, parse: Callable[[str], T]
-) -> Optional[T]:
-    before_idx = string.find(before)
+def iflatten(iterables: Iterable[Iterable[T]]) -> Iterator[T]:
+    """
+    Lazy flatten, for callers that only iterate over the items once.
+    """
+    return chain.from_iterable(iterables)
+
+
+def try_find_between(
+    string: str, before: str, after: str, start: int = 0
+) -> Optional[Tuple[int, int]]:
+    """
+    Finds the text between the first occurrence of before at or after start and the next
+    occurrence of after, without copying any part of string.
+    :return: the start and end indices of the text between before and after
+    """
+    before_idx = string.find(before, start)
     if before_idx == -1:
         return None
     before_idx += len(before)
 
-    after_idx = string[before_idx:].find(after)
+    after_idx = string.find(after, before_idx)
     if after_idx == -1:
         return None
 
-    return parse(string[before_idx : before_idx + after_idx])
+    return before_idx, after_idx
+
+
+def find_between(
+    string: str, before: str, after: str, start: int = 0
+) -> Tuple[int, int]:
+    maybe_span = try_find_between(string, before, after, start)
+    assert maybe_span is not None, f"Could not find {before} or {after} in {string}"
+
+    return maybe_span
+
+
+def try_parse_value_between_strings(
+    string: str, before: str, after: str, parse: Callable[[str], T]
+) -> Optional[T]:
+    maybe_span = try_find_between(string, before, after)
+    if maybe_span is None:
+        return None
+
+    before_idx, after_idx = maybe_span
+    return parse(string[before_idx:after_idx])
 
 
 def parse_value_between_strings(